@@ -0,0 +1,70 @@
+"""
+Startup time guard. Imports main in a fresh interpreter with -X importtime and fails when a heavy dependency is
+imported before the window appears or when the import takes longer than the budget.
+
+    python benchmarks/startup.py [--budget-ms 300] [--runs 3]
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load once the stage that needs them runs
+DEFERRED = ('pandas', 'numpy', 'sklearn', 'matplotlib', 'seaborn', 'pyarrow', 'sqlalchemy')
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times(module='main'):
+    """
+    Import a module in a fresh interpreter.
+    :return: dict of top level module name -> cumulative import time in microseconds
+    """
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, 'QT_QPA_PLATFORM': 'offscreen'}
+    )
+    if output.returncode != 0:
+        raise RuntimeError(output.stderr)
+
+    times = {}
+    for match in IMPORT_LINE.finditer(output.stderr):
+        name = match.group(4)
+        times[name] = max(times.get(name, 0), int(match.group(2)))
+    return times
+
+
+def check(budget_ms, runs=3, module='main'):
+    """
+    :return: list of failure messages, empty when startup is within budget
+    """
+    samples = [import_times(module) for _ in range(runs)]
+    failures = [f"{name} is imported at startup" for name in DEFERRED if name in samples[0]]
+
+    best = min(times.get(module, 0) for times in samples) / 1000
+    print(f"import {module}: {best:.0f} ms (best of {runs}, budget {budget_ms} ms)")
+    for name, micros in sorted(samples[0].items(), key=lambda item: -item[1])[:10]:
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    if best > budget_ms:
+        failures.append(f"import {module} took {best:.0f} ms, budget is {budget_ms} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=300, help="maximum import time of main")
+    parser.add_argument('--runs', type=int, default=3, help="fresh interpreters to start, the fastest counts")
+    args = parser.parse_args()
+
+    failures = check(args.budget_ms, args.runs)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+Pipeline benchmarks on synthetic vendor files, see synthetic.py. Every stage is timed on its own and the whole job
+end to end, each measurement in a fresh interpreter so its peak RSS is not inflated by the previous ones. The
+results are saved as json, and a previous results file can be passed to compare against.
+
+    python benchmarks/suite.py [--vendors I360 ...] [--sizes 10000 100000 1000000 5000000] [--stages ingest ...]
+                               [--output results.json] [--compare baseline.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SIZES = (10_000, 100_000, 1_000_000, 5_000_000)
+
+STAGES = (
+    'ingest',
+    'header mapping',
+    'normalization',
+    'wdnc scrub',
+    'householding',
+    'batching',
+    'writing',
+    'end to end',
+)
+
+# Source processed for each vendor, I360 landlines are the only files that are householded
+SOURCES = {
+    'Tarrance': 'MIXED',
+    'Baselice': 'MIXED',
+    'I360': 'LANDLINE',
+}
+
+STRATIFY_BY = {
+    'Tarrance': ['REGN', 'GEND'],
+    'Baselice': ['REGN', 'GEND'],
+    'I360': ['CFIPS', 'GEND'],
+}
+
+# Slower than the baseline by this ratio and by at least MIN_REGRESSION_SECONDS is reported by --compare
+REGRESSION_RATIO = 1.2
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def mapped_frame(vendor, path):
+    from pipeline import JSON_FILENAME_MAP, get_data, replace_header_names
+
+    return replace_header_names(get_data(path), JSON_FILENAME_MAP[vendor])
+
+
+def normalized_frame(vendor, path):
+    from normalize import load_spec
+
+    return load_spec(vendor).apply(mapped_frame(vendor, path))
+
+
+def prepare(vendor, stage, path, out_dir):
+    """
+    Run everything before a stage, untimed.
+    :return: callable running the stage, or None when the stage does not apply to the vendor
+    """
+    from pipeline import JSON_FILENAME_MAP, Pipeline, get_data, replace_header_names, select_vendor, save_file
+    from normalize import load_spec
+    from machine_learning import stratified_split
+    from vendor import I360
+    from wdnc import get_index, in_wdnc
+    from synthetic import PHONE_COLUMN
+
+    source, stratify_by = SOURCES[vendor], STRATIFY_BY[vendor]
+    get_index()
+
+    if stage == 'ingest':
+        return lambda: get_data(path)
+    if stage == 'header mapping':
+        df = get_data(path)
+        return lambda: replace_header_names(df, JSON_FILENAME_MAP[vendor])
+    if stage == 'normalization':
+        df, spec = mapped_frame(vendor, path), load_spec(vendor)
+        return lambda: spec.apply(df)
+    if stage == 'wdnc scrub':
+        phones = normalized_frame(vendor, path)[PHONE_COLUMN[vendor]]
+        return lambda: in_wdnc(phones)
+    if stage == 'householding':
+        if vendor != 'I360':
+            return None
+        result = I360.__new__(I360)
+        result.source = source
+        result.df = result.initialize_df(normalized_frame(vendor, path))
+        return result.household
+    if stage == 'batching':
+        df = normalized_frame(vendor, path)
+        return lambda: stratified_split(df, stratify_by, random_state=0)
+    if stage == 'writing':
+        df = normalized_frame(vendor, path)
+        data_columns = list(df.columns)
+        result = select_vendor(df, vendor, stratify_by, source, pad=False)
+        return lambda: save_file(result, os.path.join(out_dir, ''), 'BENCH', source, data_columns)
+    if stage == 'end to end':
+        job = Pipeline(vendor, path, source=source, stratify_by=stratify_by, save_path=os.path.join(out_dir, ''),
+                       project_number='BENCH', use_cache=False)
+        return job.run
+    raise ValueError(f"Unknown stage {stage}")
+
+
+def measure(vendor, stage, path):
+    """
+    Time one stage in this process. Meant to run in a fresh interpreter, see run_stage.
+    :return: dict of seconds, cpu_seconds, setup_rss_mb and peak_rss_mb, None when the stage does not apply
+    """
+    from instrument import rss_mb
+
+    with tempfile.TemporaryDirectory() as out_dir, open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        run = prepare(vendor, stage, path, out_dir)
+        if run is None:
+            return None
+        setup_rss = rss_mb()[1]
+        start, cpu_start = time.perf_counter(), time.process_time()
+        run()
+        seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+
+    return {'seconds': seconds, 'cpu_seconds': cpu_seconds, 'setup_rss_mb': setup_rss, 'peak_rss_mb': rss_mb()[1]}
+
+
+def run_stage(vendor, rows, stage, path, wdnc_path):
+    """
+    Measure one stage in a fresh interpreter, with the WDNC list of the synthetic file.
+    """
+    env = {**os.environ, 'WDNC_PATH': wdnc_path, 'WDNC_INDEX_PATH': f"{wdnc_path}.idx"}
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--measure', vendor, stage, path],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if output.returncode != 0:
+        return {'vendor': vendor, 'rows': rows, 'stage': stage, 'error': output.stderr.strip().splitlines()[-1]}
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    if result is None:
+        return None
+    return {'vendor': vendor, 'rows': rows, 'stage': stage, **result}
+
+
+def generate(vendor, rows, seed=0, data_dir=None):
+    """
+    Generate a synthetic file in another interpreter, keeping this one small.
+    :return: (vendor csv path, WDNC text file path)
+    """
+    command = [sys.executable, os.path.join(ROOT, 'benchmarks', 'synthetic.py'), vendor, str(rows), '--seed', str(seed)]
+    if data_dir:
+        command += ['--data-dir', data_dir]
+    output = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+    path, wdnc_path = output.stdout.strip().splitlines()[-2:]
+    return path, wdnc_path
+
+
+def run(vendors, sizes, stages, seed=0, data_dir=None, repeat=1):
+    """
+    :param repeat: measurements of every stage, the fastest one is kept
+    :return: list of result dicts
+    """
+    results = []
+    for vendor in vendors:
+        for rows in sizes:
+            print(f"{vendor} {rows:,} rows", flush=True)
+            path, wdnc_path = generate(vendor, rows, seed, data_dir)
+            for stage in stages:
+                runs = [run_stage(vendor, rows, stage, path, wdnc_path) for _ in range(repeat)]
+                result = min(runs, key=lambda r: r.get('seconds', float('inf')) if r else 0)
+                if result is not None:
+                    print(f"  {format_result(result)}", flush=True)
+                    results.append(result)
+    return results
+
+
+def format_result(result):
+    if 'error' in result:
+        return f"{result['stage']:<15} failed: {result['error']}"
+    rss = '' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:9.0f} MB peak"
+    return f"{result['stage']:<15} {result['seconds']:9.3f} s {result['cpu_seconds']:9.3f} s cpu {rss}"
+
+
+def compare(results, baseline):
+    """
+    Print the time of every result next to the same measurement in a baseline results file.
+    :return: list of the results slower than REGRESSION_RATIO times the baseline, ignoring small differences
+    """
+    previous = {(r['vendor'], r['rows'], r['stage']): r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    for result in results:
+        before = previous.get((result['vendor'], result['rows'], result['stage']))
+        if before is None or 'error' in result:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+        print(f"{result['vendor']:<9} {result['rows']:>9,} {result['stage']:<15} "
+              f"{before['seconds']:9.3f} s -> {result['seconds']:9.3f} s ({ratio:5.2f}x)")
+        if ratio > REGRESSION_RATIO and result['seconds'] - before['seconds'] > MIN_REGRESSION_SECONDS:
+            regressions.append(result)
+    return regressions
+
+
+def environment(seed):
+    commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit.stdout.strip() or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vendors', nargs='+', choices=list(SOURCES), default=list(SOURCES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), help="rows of the synthetic files")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help="measurements of every stage, the fastest is kept")
+    parser.add_argument('--data-dir', help="where the synthetic files are generated and kept between runs")
+    parser.add_argument('--output', default=f"benchmarks-{datetime.now():%Y%m%d-%H%M%S}.json")
+    parser.add_argument('--compare', metavar='BASELINE', help="results file of a previous run")
+    parser.add_argument('--measure', nargs=3, metavar=('VENDOR', 'STAGE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    if args.measure:
+        print(json.dumps(measure(*args.measure)))
+        return 0
+
+    results = run(args.vendors, args.sizes, args.stages, args.seed, args.data_dir, args.repeat)
+    with open(args.output, 'w') as file:
+        json.dump({'environment': environment(args.seed), 'results': results}, file, indent=2)
+    print(f"Saved {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            regressions = compare(results, json.load(file))
+        for result in regressions:
+            print(f"REGRESSION: {result['vendor']} {result['rows']:,} rows {result['stage']}")
+        return 1 if regressions else 0
+    return 1 if any('error' in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
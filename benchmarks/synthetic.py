@@ -0,0 +1,215 @@
+"""
+Seeded synthetic vendor files for the benchmarks. Headers are the aliases listed in the replacement json files, so
+the header mapping does real work, and the data has the shape of real samples: a few dozen area codes, skewed county
+and district strata, landlines shared by households and a WDNC list that hits part of the sample.
+
+    python benchmarks/synthetic.py I360 100000 [--seed 0] [--data-dir DIR]
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from header_map import load_json_file  # noqa: E402
+from pipeline import JSON_FILENAME_MAP  # noqa: E402
+
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'sample-benchmarks')
+
+# Area codes drawn for every phone number, weighted towards the first ones
+AREA_CODES = np.array([
+    210, 214, 254, 281, 325, 361, 409, 430, 432, 469, 512, 682, 713, 737, 806, 817, 830, 832, 903, 915, 936, 940,
+    956, 972, 979
+])
+
+# Share of households with 1, 2, 3 and 4 members on the same landline
+HOUSEHOLD_SIZES = (0.70, 0.18, 0.08, 0.04)
+
+# Share of the landlines on the WDNC list, the list also holds as many numbers that are not in the sample
+WDNC_RATE = 0.03
+
+# Headers of the deletion list included in every file, so the deletion is part of the ingest benchmark
+DELETED_COLUMNS = ('DATE OF BIRTH', 'MAILING ADDRESS')
+
+FIRST_NAMES = np.array(['JAMES', 'MARY', 'JOHN', 'PATRICIA', 'ROBERT', 'JENNIFER', 'MICHAEL', 'LINDA', 'DAVID',
+                        'ELIZABETH', 'WILLIAM', 'BARBARA', 'JOSE', 'MARIA', 'CARLOS', 'ANA'])
+LAST_NAMES = np.array(['SMITH', 'JOHNSON', 'WILLIAMS', 'BROWN', 'JONES', 'GARCIA', 'MILLER', 'DAVIS', 'RODRIGUEZ',
+                       'MARTINEZ', 'HERNANDEZ', 'LOPEZ', 'GONZALEZ', 'WILSON', 'ANDERSON', 'THOMAS'])
+PARTIES = np.array(['R', 'D', 'I', 'Republican', 'Democrat', 'Unaffiliated/Non-Partisan', 'L'])
+
+
+def skewed(rng, levels, size, exponent=0.8):
+    """
+    Values 1..levels with a long tail, like counties or districts ordered by population.
+    """
+    weights = 1 / np.arange(1, levels + 1) ** exponent
+    return rng.choice(np.arange(1, levels + 1), size=size, p=weights / weights.sum())
+
+
+def phone_numbers(rng, size):
+    """
+    Distinct 10 digit numbers spread over AREA_CODES.
+    """
+    numbers = np.empty(0, dtype=np.int64)
+    while len(numbers) < size:
+        count = int((size - len(numbers)) * 1.05) + 10
+        drawn = (
+            AREA_CODES[skewed(rng, len(AREA_CODES), count, exponent=0.5) - 1] * 10 ** 7
+            + rng.integers(200, 1000, count) * 10 ** 4
+            + rng.integers(0, 10 ** 4, count)
+        )
+        numbers = np.unique(np.concatenate([numbers, drawn]))
+    return rng.permutation(numbers)[:size]
+
+
+def household_phones(rng, size):
+    """
+    Landlines for size people, grouped in households of HOUSEHOLD_SIZES members sharing one number.
+    """
+    households = int(size / np.dot(HOUSEHOLD_SIZES, np.arange(1, len(HOUSEHOLD_SIZES) + 1))) + 1
+    members = rng.choice(np.arange(1, len(HOUSEHOLD_SIZES) + 1), size=households, p=HOUSEHOLD_SIZES)
+    while members.sum() < size:
+        members = np.append(members, 1)
+    return rng.permutation(np.repeat(phone_numbers(rng, len(members)), members)[:size])
+
+
+def blanks(rng, numbers, rate):
+    """
+    Phone numbers as text with a share of them left blank.
+    """
+    text = numbers.astype(str).astype(object)
+    text[rng.random(len(text)) < rate] = ''
+    return text
+
+
+def people(rng, size):
+    return {
+        'FNAME': rng.choice(FIRST_NAMES, size),
+        'LNAME': rng.choice(LAST_NAMES, size),
+        'GEND': rng.choice(['M', 'F', 'U'], size, p=[0.48, 0.5, 0.02]),
+        'DOBY': rng.integers(1930, 2006, size).astype(str),
+        'PARTY': rng.choice(PARTIES, size, p=[0.3, 0.3, 0.2, 0.06, 0.06, 0.05, 0.03]),
+        'CFIPS': skewed(rng, 254, size).astype(str),
+        'CD': skewed(rng, 38, size, exponent=0.2).astype(str),
+        'SD': skewed(rng, 31, size, exponent=0.2).astype(str),
+        'HD': skewed(rng, 150, size, exponent=0.2).astype(str),
+        'IZIP': (75000 + skewed(rng, 2000, size)).astype(str),
+    }
+
+
+def tarrance(rng, size):
+    cell = rng.random(size) < 0.55
+    columns = people(rng, size)
+    columns.update({
+        'PHONE': phone_numbers(rng, size).astype(str),
+        'CELL': np.where(cell, 'Y', 'N'),
+        'REGN': skewed(rng, 11, size, exponent=0.3).astype(str),
+    })
+    return pd.DataFrame(columns), ~cell
+
+
+def baselice(rng, size):
+    cell = rng.random(size) < 0.55
+    columns = people(rng, size)
+    columns.update({
+        'TEL': phone_numbers(rng, size).astype(str),
+        'STYPE': np.where(cell, '2', '1'),
+        'REGN': skewed(rng, 11, size, exponent=0.3).astype(str),
+        'SVID': rng.permutation(size).astype(str),
+    })
+    return pd.DataFrame(columns), ~cell
+
+
+def i360(rng, size):
+    columns = people(rng, size)
+    landlines = household_phones(rng, size)
+    days = rng.integers(0, 365 * 40, size)
+    columns.update({
+        'PHONE': blanks(rng, landlines, 0.1),
+        'CELL': blanks(rng, phone_numbers(rng, size), 0.45),
+        'RDATE': (np.datetime64('1985-01-01') + days.astype('timedelta64[D]')).astype(str),
+        'GCCD20': columns['CD'], 'GCSSD20': columns['SD'], 'GCSHD20': columns['HD'],
+        'GCD22': columns['CD'], 'GSD22': columns['SD'], 'GHD22': columns['HD'],
+    })
+    return pd.DataFrame(columns), columns['PHONE'] != ''
+
+
+GENERATORS = {
+    'Tarrance': tarrance,
+    'Baselice': baselice,
+    'I360': i360,
+}
+
+PHONE_COLUMN = {
+    'Tarrance': 'PHONE',
+    'Baselice': 'TEL',
+    'I360': 'PHONE',
+}
+
+
+def vendor_headers(vendor):
+    """
+    Canonical header -> the first alias the vendor's replacement json lists for it.
+    """
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        replacements = load_json_file(JSON_FILENAME_MAP[vendor])
+    finally:
+        os.chdir(cwd)
+    return {canonical: aliases[0] for canonical, aliases in replacements.items() if aliases}
+
+
+def wdnc_list(rng, phones, listed):
+    """
+    WDNC_RATE of the listed landlines and as many numbers that are not in the sample.
+    """
+    phones = np.asarray(phones, dtype=object)[listed].astype(np.int64)
+    hits = rng.choice(phones, size=int(len(phones) * WDNC_RATE), replace=False)
+    others = phone_numbers(rng, len(hits) * 2)
+    others = others[~np.isin(others, phones)][:len(hits)]
+    return np.sort(np.concatenate([hits, others]))
+
+
+def generate(vendor, rows, seed=0, data_dir=DATA_DIR):
+    """
+    Write a vendor file and its WDNC list, reusing them when they were already generated with the same seed.
+    :return: (vendor csv path, WDNC text file path)
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    stem = os.path.join(data_dir, f"{vendor.lower()}_{rows}_{seed}")
+    path, wdnc_path = f"{stem}.csv", f"{stem}_wdnc.txt"
+    if os.path.exists(path) and os.path.exists(wdnc_path):
+        return path, wdnc_path
+
+    rng = np.random.default_rng(seed)
+    df, listed = GENERATORS[vendor](rng, rows)
+    wdnc = wdnc_list(rng, df[PHONE_COLUMN[vendor]], np.asarray(listed))
+
+    for col in DELETED_COLUMNS:
+        df[col] = ''
+    df = df.rename(columns=vendor_headers(vendor))
+
+    df.to_csv(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)
+    pd.Series(wdnc).to_csv(wdnc_path, index=False, header=False)
+    return path, wdnc_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('vendor', choices=list(GENERATORS))
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+    print(*generate(args.vendor, args.rows, args.seed, args.data_dir), sep='\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import os
+import glob
+import json
+import hashlib
+import tempfile
+import importlib.util
+
+import numpy as np
+
+# Total size of the cached frames before the least recently used ones are evicted
+CACHE_MAX_BYTES = int(os.environ.get("INGEST_CACHE_MAX_BYTES", 5 * 1024 ** 3))
+
+
+def cache_dir_for(save_path):
+    """
+    Cache directory next to the project's SAMPLE/auto/ directory, INGEST_CACHE_DIR when set.
+    """
+    if os.environ.get("INGEST_CACHE_DIR"):
+        return os.environ.get("INGEST_CACHE_DIR")
+    return os.path.join(os.path.dirname(os.path.normpath(save_path)), 'cache')
+
+
+def path_key(file_path):
+    return hashlib.sha256(os.path.abspath(file_path).encode()).hexdigest()[:16]
+
+
+def fingerprint(file_path, *extra):
+    """
+    Key for the current version of a file: path + size + mtime, and anything else that changes the parsed frame.
+    """
+    stat = os.stat(file_path)
+    payload = json.dumps([os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, *extra], default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def remove(path):
+    """
+    Remove a cache file that another process sharing the directory may have removed already.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class IngestCache:
+    """
+    Parquet cache of parsed, header normalized vendor frames. Entries are keyed by file fingerprint, read back with
+    memory mapping and evicted least recently used first once the directory grows past max_bytes.
+    Several processes may share the directory, so any entry can disappear between two calls.
+    """
+
+    def __init__(self, directory, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self):
+        return importlib.util.find_spec('pyarrow') is not None and bool(self.directory)
+
+    def entry_path(self, file_path, *extra):
+        return os.path.join(self.directory, f"{path_key(file_path)}_{fingerprint(file_path, *extra)}.parquet")
+
+    def get(self, file_path, *extra, columns=None, nrows=None):
+        """
+        Cached frame for the current version of file_path, or None on a miss.
+        :param columns: columns to read, everything when not specified
+        :param nrows: amount of rows to read, everything when not specified
+        """
+        if not self.enabled:
+            return None
+
+        path = self.entry_path(file_path, *extra)
+        if not os.path.exists(path):
+            return None
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        try:
+            if columns is not None:
+                keep = set(columns)
+                columns = [name for name in pq.read_schema(path).names if name in keep]
+
+            if nrows is not None:
+                parquet_file = pq.ParquetFile(path, memory_map=True)
+                batch = next(parquet_file.iter_batches(batch_size=nrows, columns=columns), None)
+                if batch is None:
+                    table = parquet_file.schema_arrow.empty_table()
+                    table = table.select(columns) if columns is not None else table
+                else:
+                    table = pa.Table.from_batches([batch])
+            else:
+                table = pq.read_table(path, columns=columns, memory_map=True)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+
+        df = table.to_pandas()
+        # Arrow returns None for missing strings where read_csv gives NaN. Only the string columns holding any are
+        # converted, the others are returned as read.
+        for name in table.column_names:
+            if table.column(name).null_count and df[name].dtype == object:
+                df[name] = df[name].where(df[name].notna(), np.nan)
+        return df
+
+    def put(self, file_path, df, *extra):
+        """
+        Store the frame for the current version of file_path, replacing older versions, then evict down to max_bytes.
+        """
+        if not self.enabled:
+            return None
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.invalidate(file_path)
+
+        path = self.entry_path(file_path, *extra)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            remove(tmp)
+            raise
+
+        self.evict()
+        return path
+
+    def entries(self):
+        return glob.glob(os.path.join(self.directory, '*.parquet'))
+
+    def invalidate(self, file_path):
+        """
+        Remove every cached version of file_path.
+        """
+        for path in glob.glob(os.path.join(self.directory, f"{path_key(file_path)}_*.parquet")):
+            remove(path)
+
+    def clear(self):
+        for path in self.entries():
+            remove(path)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in max_bytes. Entries removed by another process
+        meanwhile are skipped.
+        """
+        entries = []
+        for path in self.entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            _, size, path = entries.pop(0)
+            total -= size
+            remove(path)
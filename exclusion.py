@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from header_map import BASE_FILENAME, compile_header_map
+
+# Columns the names are matched against
+NAME_COLUMNS = ('FNAME', 'LNAME')
+
+
+def name_keys(name):
+    """
+    (first, last) keys a 'FIRST LAST' name can match. A name with several words matches every split, as the
+    'FNAME LNAME' string it is compared with could be split anywhere, e.g. MARY ANN SMITH matches MARY / ANN SMITH
+    and MARY ANN / SMITH.
+    """
+    words = name.strip().upper().split(' ')
+    return [(' '.join(words[:i]), ' '.join(words[i:])) for i in range(1, len(words))]
+
+
+def factorize(column: pd.Series):
+    """
+    Codes and unique values of a column, -1 for missing values. Categorical columns already hold both.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    codes, uniques = pd.factorize(column)
+    return codes, pd.Index(uniques)
+
+
+class NameExclusion:
+    """
+    People to remove from a sample, as (first, last) keys. Rows are matched with a hashed anti-join on FNAME and
+    LNAME: each column is factorized through a hash table and the keys are compared as integer code pairs, so no per
+    row string is built and the cost hardly depends on the amount of names.
+    """
+
+    def __init__(self, keys=()):
+        self.keys = set(keys)
+
+    @classmethod
+    def from_names(cls, names):
+        """
+        :param names: iterable of 'FIRST LAST' names, blank lines are skipped
+        """
+        return cls(key for name in names or [] if name.strip() for key in name_keys(name))
+
+    @classmethod
+    def from_file(cls, file_path):
+        """
+        Names from a staff, donor or prior respondent list. A csv or xlsx file with first and last name columns, under
+        any header listed for FNAME and LNAME in replacement_headers.json, is matched column by column, and a single
+        column file holds one 'FIRST LAST' name per row. Any other file is read as one 'FIRST LAST' name per line.
+        :raises ValueError: when the file has several columns but no first and last name columns
+        """
+        if file_path.lower().endswith(('.csv', '.xlsx', '.xls')):
+            if file_path.lower().endswith('.csv'):
+                df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+            else:
+                df = pd.read_excel(file_path, dtype=str, keep_default_na=False)
+            headers = [str(col) for col in df.columns]
+            df.columns = [header.strip().upper() for header in headers]
+            compile_header_map(BASE_FILENAME).apply(df)
+            if all(col in df.columns for col in NAME_COLUMNS):
+                names = df[list(NAME_COLUMNS)].apply(lambda column: column.str.strip().str.upper())
+                names = names[(names['FNAME'] != '') & (names['LNAME'] != '')]
+                return cls(zip(names['FNAME'], names['LNAME']))
+            if len(df.columns) > 1:
+                raise ValueError(
+                    f"{file_path} has no first and last name columns, name them with headers listed for FNAME and "
+                    f"LNAME in {BASE_FILENAME}"
+                )
+            # Without a header the first name is read as one
+            return cls.from_names(headers + df.iloc[:, 0].tolist())
+
+        with open(file_path, 'r') as file:
+            lines = file.read().split("\n")
+        delimited = next((line for line in lines if ',' in line or '\t' in line), None)
+        if delimited is not None:
+            raise ValueError(f"{file_path} should hold one 'FIRST LAST' name per line, found {delimited!r}")
+        return cls.from_names(lines)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __or__(self, other):
+        return NameExclusion(self.keys | other.keys)
+
+    def __repr__(self):
+        return f"<NameExclusion({len(self.keys)} keys)>"
+
+    def mask(self, df):
+        """
+        :return: boolean numpy array, True for the rows whose FNAME and LNAME match a key
+        """
+        if not self.keys or df.empty:
+            return np.zeros(len(df), dtype=bool)
+
+        first_codes, firsts = factorize(df['FNAME'])
+        last_codes, lasts = factorize(df['LNAME'])
+        keys = list(self.keys)
+        first_keys = firsts.get_indexer(pd.Index([first for first, _ in keys], dtype=object))
+        last_keys = lasts.get_indexer(pd.Index([last for _, last in keys], dtype=object))
+        present = (first_keys >= 0) & (last_keys >= 0)
+        if not present.any():
+            return np.zeros(len(df), dtype=bool)
+
+        # Only rows whose first and last name both appear in some key are compared as pairs. The extra False at the
+        # end of the lookups is where the -1 codes of missing names land.
+        first_hit = np.zeros(len(firsts) + 1, dtype=bool)
+        last_hit = np.zeros(len(lasts) + 1, dtype=bool)
+        first_hit[first_keys[present]] = True
+        last_hit[last_keys[present]] = True
+        rows = np.flatnonzero(first_hit[first_codes] & last_hit[last_codes])
+
+        pairs = first_keys[present].astype(np.int64) * len(lasts) + last_keys[present]
+        matched = np.zeros(len(df), dtype=bool)
+        matched[rows] = np.isin(first_codes[rows].astype(np.int64) * len(lasts) + last_codes[rows], pairs)
+        return matched
+
+    def apply(self, df):
+        """
+        df without the matching rows. Without FNAME and LNAME columns nothing is removed.
+        :return: pandas.DataFrame
+        """
+        if not self.keys:
+            return df
+        missing = [col for col in NAME_COLUMNS if col not in df.columns]
+        if missing:
+            print(f"Warning: no {', '.join(missing)} column, {len(self.keys)} names were not excluded")
+            return df
+
+        mask = self.mask(df)
+        if not mask.any():
+            return df
+        return df[~mask].reset_index(drop=True)
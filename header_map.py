@@ -0,0 +1,135 @@
+import os
+import json
+
+BASE_FILENAME = 'replacement_headers.json'
+
+# json filename -> (mtimes of the files it was compiled from, HeaderMap)
+_compiled = {}
+
+# vendor name -> (models.VendorSpec it was compiled from, HeaderMap)
+_compiled_db = {}
+
+
+def load_json_file(filename):
+    data = {}
+    with open(BASE_FILENAME, 'r') as file:
+        data = json.load(file)
+    try:
+        with open(filename, 'r') as file:
+            data.update(json.load(file))
+    except FileNotFoundError:
+        print(f"Error: {filename} not found.")
+        return {}
+    except json.JSONDecodeError:
+        print(f"Error: Failed to decode JSON from {filename}.")
+        return {}
+
+    return data
+
+
+class HeaderMap:
+    """
+    Compiled alias -> canonical header lookup. Aliases are matched against the file headers in one pass and applied
+    with a single rename.
+    """
+
+    def __init__(self, replacements: dict):
+        """
+        :param replacements: canonical header -> list of aliases, as in the replacement json files. An alias listed
+        under several canonical headers keeps the first one.
+        """
+        self.aliases = {}
+        self.conflicts = {}
+        for canonical, aliases in replacements.items():
+            for alias in aliases:
+                if alias == canonical:
+                    continue
+                if alias in self.aliases and self.aliases[alias] != canonical:
+                    self.conflicts.setdefault(alias, [self.aliases[alias]]).append(canonical)
+                    continue
+                self.aliases[alias] = canonical
+
+    def __len__(self):
+        return len(self.aliases)
+
+    def renames(self, columns):
+        """
+        :return: file header -> canonical header for the columns that have an alias
+        """
+        return {col: self.aliases[col] for col in columns if col in self.aliases}
+
+    def collisions(self, columns):
+        """
+        Canonical headers that more than one column would end up with, either two aliases or an alias and the
+        canonical header itself.
+        :return: canonical header -> list of columns mapping to it
+        """
+        renames = self.renames(columns)
+        targets = {}
+        for col in columns:
+            targets.setdefault(renames.get(col, col), []).append(col)
+        return {target: cols for target, cols in targets.items() if len(cols) > 1 and target in renames.values()}
+
+    def apply(self, df):
+        """
+        Rename the aliased columns of df in place, printing any collisions.
+        """
+        for target, cols in self.collisions(df.columns).items():
+            print(f"Warning: {', '.join(map(str, cols))} all map to {target}")
+        renames = self.renames(df.columns)
+        if renames:
+            df.rename(columns=renames, inplace=True)
+        return df
+
+
+def source_mtimes(json_filename):
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in (BASE_FILENAME, json_filename))
+
+
+def compile_header_map(json_filename):
+    """
+    HeaderMap of replacement_headers.json updated with the vendor json. Compiled once and kept in memory until one of
+    the two files is modified.
+    :param json_filename: vendor replacement json
+    :return: HeaderMap
+    """
+    mtimes = source_mtimes(json_filename)
+    cached = _compiled.get(json_filename)
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+
+    header_map = HeaderMap(load_json_file(json_filename))
+    for alias, canonicals in header_map.conflicts.items():
+        print(f"Warning: {alias} is listed under {', '.join(canonicals)}, using {canonicals[0]}")
+    _compiled[json_filename] = (mtimes, header_map)
+    return header_map
+
+
+def header_map_from_db(vendor_name):
+    """
+    HeaderMap compiled from the database tables instead of the json files, see models.load_vendor_spec. Compiled
+    again only when the spec cache of models fetched a new spec.
+    :param vendor_name: tblVendors.vendor_name
+    """
+    from models import load_vendor_spec
+
+    spec = load_vendor_spec(vendor_name)
+    cached = _compiled_db.get(vendor_name)
+    if cached is not None and cached[0] is spec:
+        return cached[1]
+
+    header_map = HeaderMap(spec.replacements)
+    _compiled_db[vendor_name] = (spec, header_map)
+    return header_map
+
+
+def load_header_map(vendor, json_filename, source='json'):
+    """
+    :param vendor: vendor name, as in pipeline.VENDOR_MAP
+    :param json_filename: vendor replacement json
+    :param source: 'json' for the replacement json files, 'db' for the database tables
+    :return: HeaderMap
+    """
+    if source == 'db':
+        return header_map_from_db(vendor)
+    return compile_header_map(json_filename)
@@ -0,0 +1,303 @@
+import os
+import json
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrument import span
+
+# Rows parsed at a time when streaming csv and txt files
+CHUNK_SIZE = 250_000
+
+# Strata and code columns stored as pandas Categorical whenever they are read
+CATEGORY_COLUMNS = ('REGN', 'SD', 'CD', 'HD', 'CFIPS', 'GEND', 'PRTY', 'STYPE', 'CELL', 'VTYPE')
+
+# Other text columns are sampled and stored as categorical when the sample has at most this many distinct values
+CATEGORY_SAMPLE_ROWS = 10_000
+CATEGORY_MAX_LEVELS = 1_000
+
+
+def load_deletion_headers(filename='deletion_headers.json'):
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+def file_type(file_path):
+    return file_path.split(".")[-1]
+
+
+def csv_delimiter(file_path):
+    match file_type(file_path):
+        case 'csv':
+            return ','
+        case 'txt' | 'TXT':
+            return '\t'
+        case 'xlsx' | 'xls':
+            return None
+        case other:
+            raise ValueError(f"File type not supported: {other}")
+
+
+def excel_engine():
+    """
+    pandas engine for xlsx files: EXCEL_ENGINE when set, calamine when python-calamine is installed, openpyxl
+    otherwise.
+    """
+    if os.environ.get("EXCEL_ENGINE"):
+        return os.environ.get("EXCEL_ENGINE")
+    if importlib.util.find_spec('python_calamine') is not None:
+        return 'calamine'
+    return 'openpyxl'
+
+
+def read_sheet(file_path, sheet, usecols=None, nrows=None, engine=None):
+    """
+    Read one sheet with every cell as a string.
+    :return: pandas.DataFrame, None when the sheet does not have the usecols columns
+    """
+    try:
+        return pd.read_excel(
+            file_path, sheet_name=sheet, dtype=str, usecols=usecols, nrows=nrows, engine=engine or excel_engine()
+        )
+    except ValueError:
+        return None
+
+
+def read_excel(file_path, usecols=None, nrows=None, parallel=None):
+    """
+    Read a workbook with every cell as a string. Sheets with the same header as the first one are appended to it,
+    each sheet is parsed in its own process when there are several.
+    :param usecols: column names to read, everything when not specified
+    :param nrows: amount of rows to read from the first sheet, the other sheets are skipped
+    :param parallel: read the sheets in worker processes, decided from the sheet and cpu count when not specified
+    :return: pandas.DataFrame
+    """
+    engine = excel_engine()
+    with pd.ExcelFile(file_path, engine=engine) as workbook:
+        sheets = workbook.sheet_names[:1] if nrows is not None else workbook.sheet_names
+
+    if parallel is None:
+        parallel = len(sheets) > 1 and (os.cpu_count() or 1) > 1
+
+    args = [(file_path, sheet, usecols, nrows, engine) for sheet in sheets]
+    if parallel:
+        with ProcessPoolExecutor(max_workers=min(len(sheets), os.cpu_count() or 1)) as pool:
+            frames = list(pool.map(read_sheet, *zip(*args)))
+    else:
+        frames = [read_sheet(*arg) for arg in args]
+
+    first = frames[0]
+    if first is None:
+        raise ValueError(f"Columns not found in the first sheet of {file_path}")
+    kept = [first]
+    for sheet, frame in zip(sheets[1:], frames[1:]):
+        if frame is None or list(frame.columns) != list(first.columns):
+            print(f"Skipping sheet {sheet}: its header does not match the first sheet")
+            continue
+        kept.append(frame)
+    return kept[0] if len(kept) == 1 else pd.concat(kept, ignore_index=True)
+
+
+def read_header(file_path):
+    """
+    Read only the header row of a vendor file.
+    :return: list of column names as they appear in the file
+    """
+    delimiter = csv_delimiter(file_path)
+    if delimiter is None:
+        return list(pd.read_excel(file_path, nrows=0, engine=excel_engine()).columns)
+    return list(pd.read_csv(file_path, delimiter=delimiter, dtype=str, nrows=0).columns)
+
+
+def resolve_columns(header, usecols=None, columns_to_delete=None):
+    """
+    Pick the file columns worth reading: those not listed in deletion_headers.json and, when usecols is specified,
+    listed in usecols. Both lists are compared against the uppercased header.
+    :param header: column names as they appear in the file
+    :param usecols: uppercased header names to keep, everything when not specified
+    :param columns_to_delete: uppercased header names to drop, deletion_headers.json when not specified
+    :return: list of column names as they appear in the file
+    """
+    columns_to_delete = set(load_deletion_headers() if columns_to_delete is None else columns_to_delete)
+    keep = None if usecols is None else set(usecols)
+    return [
+        col for col in header
+        if str(col).upper() not in columns_to_delete and (keep is None or str(col).upper() in keep)
+    ]
+
+
+def read_file(file_path, nrows=None, usecols=None, rename=None, transforms=(), chunksize=CHUNK_SIZE, cache=None):
+    """
+    Read a vendor file with every column as a string. The kept columns are resolved from the header first, so the
+    deleted columns are never parsed, and csv/txt files are streamed in chunks so the transforms run as the file is
+    read. Peak memory follows the kept columns rather than the full vendor width.
+    :param file_path: csv, txt or xlsx file
+    :param nrows: amount of rows to read, everything when not specified
+    :param usecols: uppercased header names to read, every column not in deletion_headers.json when not specified
+    :param rename: uppercased header name -> new name, applied to every chunk
+    :param transforms: callables taking and returning a chunk, applied after renaming
+    :param chunksize: rows per chunk for csv and txt files
+    :param cache: cache.IngestCache holding parsed frames, the file is always parsed when not specified
+    :return: pandas.DataFrame with uppercased headers
+    """
+    def prepare(chunk):
+        chunk.columns = [str(col).upper() for col in chunk.columns]
+        if rename:
+            chunk = chunk.rename(columns=rename)
+        for transform in transforms:
+            chunk = transform(chunk)
+        return chunk
+
+    if cache is not None and cache.enabled:
+        # The cache holds every column that survives deletion, so one entry serves any header mapping
+        key = sorted(load_deletion_headers())
+        df = cache.get(file_path, key, columns=usecols, nrows=nrows)
+        # Workbooks are parsed in full even for a sample, so their XML is only ever read once
+        if df is None and (nrows is None or csv_delimiter(file_path) is None):
+            df = read_file(file_path, chunksize=chunksize)
+            cache.put(file_path, df, key)
+            if usecols is not None:
+                keep = set(usecols)
+                df = df[[col for col in df.columns if col in keep]]
+            if nrows is not None:
+                df = df.head(nrows).copy()
+        if df is not None:
+            return prepare(df)
+
+    with span('delete columns') as stage:
+        header = read_header(file_path)
+        columns = resolve_columns(header, usecols)
+        stage.set(columns_in=len(header), columns_out=len(columns), file_type=file_type(file_path))
+
+    delimiter = csv_delimiter(file_path)
+    if delimiter is None:
+        return prepare(read_excel(file_path, usecols=columns, nrows=nrows))
+
+    reader = pd.read_csv(file_path, delimiter=delimiter, dtype=str, usecols=columns, nrows=nrows, chunksize=chunksize)
+    with reader:
+        chunks = [prepare(chunk) for chunk in reader]
+
+    if not chunks:
+        return prepare(pd.DataFrame(columns=columns, dtype=str))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def is_low_cardinality(column: pd.Series, sample_rows=CATEGORY_SAMPLE_ROWS, max_levels=CATEGORY_MAX_LEVELS):
+    """
+    Guess from a random sample if a text column has few enough distinct values to be stored as categorical.
+    """
+    if len(column) > sample_rows:
+        column = column.sample(sample_rows, random_state=0)
+    levels = column.nunique()
+    return levels <= max_levels and levels <= len(column) // 2
+
+
+def categorize(df, columns=CATEGORY_COLUMNS, detect=True, report=False):
+    """
+    Store the low cardinality text columns of df as pandas Categorical, with sorted categories so the category codes
+    follow the same order as sorted values. The declared columns are always converted, the other text columns only
+    when is_low_cardinality holds for a sample of them.
+    :param columns: columns to convert whenever they hold text
+    :param detect: also sample the other text columns
+    :param report: print the memory used by the converted columns before and after
+    :return: pandas.DataFrame
+    """
+    declared = set(columns)
+    converted = {}
+    for col in df.columns:
+        column = df[col]
+        if column.dtype != object or len(column) == 0:
+            continue
+        if col in declared or (detect and is_low_cardinality(column)):
+            categorical = column.astype('category')
+            if len(categorical.cat.categories) <= max(len(column) // 2, 1):
+                converted[col] = categorical
+
+    if report and converted:
+        memory_report(df[list(converted)], pd.DataFrame(converted))
+
+    for col, categorical in converted.items():
+        df[col] = categorical
+    return df
+
+
+def memory_report(before, after):
+    """
+    Print the deep memory usage of the same columns in two frames.
+    :return: pandas.DataFrame with before and after bytes per column
+    """
+    report = pd.DataFrame({
+        'before': before.memory_usage(deep=True, index=False),
+        'after': after.memory_usage(deep=True, index=False)
+    })
+    report.loc['TOTAL'] = report.sum()
+    mb = (report / 1024 ** 2).round(2)
+    mb['saved %'] = np.where(report['before'] > 0, (1 - report['after'] / report['before']) * 100, 0).round(1)
+    print(f"Memory of the categorical columns (MB):\n{mb.to_string()}")
+    return report
+
+
+def input_files(paths):
+    """
+    Expand a file, a directory or a list of both into the vendor files to read. Directories contribute their csv, txt
+    and xlsx files in name order.
+    :return: list of file paths
+    """
+    if not paths:
+        return []
+    if isinstance(paths, str):
+        paths = [paths]
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if file_type(name) in ('csv', 'txt', 'TXT', 'xlsx', 'xls') and os.path.isfile(os.path.join(path, name))
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def concat_frames(frames):
+    """
+    Append frames whose column sets differ, column by column. Columns are ordered by first appearance. A column
+    missing from a frame is filled with its missing value without changing the dtype: 0 for integer phone columns,
+    NaN for text and categorical columns. Categorical columns are merged over the union of their categories.
+    :param frames: list of pandas.DataFrame
+    :return: pandas.DataFrame
+    """
+    frames = [frame for frame in frames if frame is not None]
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    data = {}
+    for col in columns:
+        present = [frame[col] for frame in frames if col in frame.columns]
+        if any(isinstance(part.dtype, pd.CategoricalDtype) for part in present):
+            categories = pd.api.types.union_categoricals(
+                [part.astype('category').array for part in present], sort_categories=True
+            ).categories
+            dtype = pd.CategoricalDtype(categories)
+        elif all(pd.api.types.is_integer_dtype(part.dtype) for part in present):
+            dtype = np.int64
+        else:
+            dtype = object
+
+        parts = []
+        for frame in frames:
+            if col in frame.columns:
+                parts.append(frame[col].astype(dtype))
+            elif dtype is np.int64:
+                parts.append(pd.Series(np.zeros(len(frame), dtype=np.int64)))
+            else:
+                parts.append(pd.Series(np.nan, index=range(len(frame)), dtype=dtype))
+        data[col] = pd.concat(parts, ignore_index=True)
+
+    return pd.DataFrame(data)
@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Name of the trace file written next to the job's output files, see Tracer.write
+TRACE_NAME = '_TRACE'
+
+# Tracer of the stage running in each thread, so nested stages find it without it being passed around
+_local = threading.local()
+
+
+def rss_mb():
+    """
+    (current, peak) resident set size of this process in MB, None where it cannot be read. Worker processes are
+    not included.
+    """
+    try:
+        with open('/proc/self/status', 'r') as file:
+            status = dict(line.split(':', 1) for line in file if ':' in line)
+        return int(status['VmRSS'].split()[0]) / 1024, int(status['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    # Bytes on macOS, kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None, peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def reset_peak_rss():
+    """
+    Start a new peak RSS measurement where the OS allows it (Linux), otherwise peaks are those of the whole process.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+
+
+class Span:
+    """
+    One timed stage. rows_out and details may be set while the stage runs.
+    """
+
+    def __init__(self, name, rows_in=None, depth=0, **details):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.depth = depth
+        self.details = details
+        self.start = None
+        self.wall = None
+        self.cpu = None
+        self.rss_mb = None
+        self.peak_rss_mb = None
+
+    def __repr__(self):
+        return f"<Span({self.name}, wall={self.wall}, rows_in={self.rows_in}, rows_out={self.rows_out})>"
+
+    def set(self, **details):
+        self.details.update(details)
+
+    def record_peak(self, peak):
+        if peak is not None:
+            self.peak_rss_mb = peak if self.peak_rss_mb is None else max(self.peak_rss_mb, peak)
+
+    def as_dict(self):
+        return {
+            'name': self.name, 'wall_s': self.wall, 'cpu_s': self.cpu, 'rows_in': self.rows_in,
+            'rows_out': self.rows_out, 'rss_mb': self.rss_mb, 'peak_rss_mb': self.peak_rss_mb, 'depth': self.depth,
+            **self.details
+        }
+
+
+class NullSpan:
+    """
+    Stand-in returned when tracing is disabled, accepts and forgets rows_out and details.
+    """
+    rows_in = rows_out = None
+
+    def set(self, **details):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Records the wall time, CPU time, row counts and peak memory of the pipeline stages of one job. A stage opened
+    with span is also visible to the functions it calls through the module level span, so nested stages are
+    recorded without passing the tracer around.
+    """
+
+    def __init__(self, name=''):
+        self.name = name
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._open = []
+
+    @contextmanager
+    def span(self, name, rows_in=None, **details):
+        span = Span(name, rows_in, len(self._open), **details)
+        outer = getattr(_local, 'tracer', None)
+        _local.tracer = self
+
+        # Open stages keep the peak so far, the peak is then reset so this stage only sees its own
+        peak = rss_mb()[1]
+        for parent in self._open:
+            parent.record_peak(peak)
+        reset_peak_rss()
+
+        self._open.append(span)
+        self.spans.append(span)
+        span.start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield span
+        finally:
+            span.wall = time.perf_counter() - span.start
+            span.cpu = time.process_time() - cpu_start
+            span.rss_mb, peak = rss_mb()
+            for open_span in self._open:
+                open_span.record_peak(peak)
+            self._open.pop()
+            _local.tracer = outer
+
+    def total(self):
+        return sum(span.wall or 0 for span in self.spans if span.depth == 0)
+
+    def summary(self):
+        """
+        One line per stage, nested stages indented.
+        """
+        lines = [f"{'stage':<28}{'wall s':>9}{'cpu s':>9}{'rows in':>11}{'rows out':>11}{'peak MB':>9}"]
+        for span in self.spans:
+            rows_in = '' if span.rows_in is None else f"{span.rows_in:,}"
+            rows_out = '' if span.rows_out is None else f"{span.rows_out:,}"
+            peak = '' if span.peak_rss_mb is None else f"{span.peak_rss_mb:.0f}"
+            lines.append(
+                f"{'  ' * span.depth + span.name:<28}{span.wall or 0:9.3f}{span.cpu or 0:9.3f}{rows_in:>11}"
+                f"{rows_out:>11}{peak:>9}"
+            )
+        return '\n'.join(lines)
+
+    def headline(self, top=3):
+        """
+        Total time and the slowest nested stages, short enough for a status line.
+        """
+        # Spans are recorded in start order, so a span is a leaf when the next one is not nested in it
+        leaves = [
+            span for i, span in enumerate(self.spans)
+            if i + 1 == len(self.spans) or self.spans[i + 1].depth <= span.depth
+        ]
+        slowest = sorted(leaves, key=lambda span: -(span.wall or 0))[:top]
+        return f"{self.total():.1f} s ({', '.join(f'{span.name} {span.wall:.1f} s' for span in slowest)})"
+
+    def trace(self):
+        """
+        Chrome trace event format, loadable in chrome://tracing or Perfetto. The stage table is kept under 'stages'.
+        """
+        pid, tid = os.getpid(), threading.get_ident()
+        events = [{
+            'name': span.name, 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': (span.start - self.origin) * 1e6, 'dur': (span.wall or 0) * 1e6,
+            'args': {key: value for key, value in span.as_dict().items() if key not in ('name', 'depth')}
+        } for span in self.spans]
+        return {
+            'traceEvents': events, 'displayTimeUnit': 'ms', 'job': self.name,
+            'stages': [span.as_dict() for span in self.spans]
+        }
+
+    def write(self, directory, name=None):
+        """
+        Write the trace next to the output files as the first free {name}_TRACE.json, {name}_TRACE1.json, ... Traces
+        are numbered on their own, trace n is not necessarily written by the job of sample file n.
+        :return: path of the trace file
+        """
+        from writer import allocate_versions, atomic_write
+
+        os.makedirs(directory, exist_ok=True)
+        base = f"{name or self.name}{TRACE_NAME}"
+        path = os.path.join(directory, allocate_versions(directory, [base], '.json')[base])
+
+        def write(tmp):
+            with open(tmp, 'w') as file:
+                json.dump(self.trace(), file, indent=1)
+
+        return atomic_write(path, write)
+
+
+def active():
+    """
+    Tracer of the stage running in this thread, None when tracing is disabled.
+    """
+    return getattr(_local, 'tracer', None)
+
+
+def span(name, rows_in=None, **details):
+    """
+    Nested stage of the active tracer, a no-op when none is active.
+    """
+    tracer = active()
+    if tracer is None:
+        return NULL_SPAN
+    return tracer.span(name, rows_in, **details)
@@ -0,0 +1,21 @@
+import sys
+import importlib.util
+
+
+def lazy_import(name):
+    """
+    Import a module on first attribute access instead of at import time, so heavy dependencies only load when the
+    stage that needs them runs.
+    :param name: module name
+    :return: module, loaded the first time one of its attributes is used
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -1,114 +1,155 @@
-from sklearn.model_selection import train_test_split
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
+import numpy as np
 import os
 
+from strata import StratumKey
 
-def stratified_split(df, columns, n: int = 20):
+
+def assign_batches(df, columns, n: int = 20, random_state=None):
     """
-    Stratified split a dataframe into n batches. A default of 20 is used when no amount is specified.
+    Assign every row of a dataframe to one of n stratified batches in a single vectorized pass.
+    Rows are shuffled inside their stratum and dealt out in rotation, so each stratum gives every batch
+    floor(count / n) rows and its remainder goes to the next batches in line (largest remainder allocation).
+    Batch sizes never differ by more than one row.
     :param df: pandas.dataframe
     :param columns: list of columns to stratify by
     :param n: amount of batches
-    :return: batchified dataframes
+    :param random_state: seed or numpy Generator, random when not specified
+    :return: numpy array of zero based batch labels aligned with the rows of df
     """
 
-    stratify_col = df[columns].astype(str).agg('-'.join, axis=1)
-    # print(stratify_col.to_string())
-    # print(stratify_col.value_counts().to_string())
-    # print(stratify_col.shape[0])
+    rng = np.random.default_rng(random_state)
+    size = len(df)
+    if size == 0:
+        return np.empty(0, dtype=np.int64)
 
-    # for col in columns:
-    #     print(col, df[col].value_counts().shape[0])
+    codes = StratumKey(df, columns).codes
 
-    stratify_counts = stratify_col.value_counts()
-    low_count_groups = stratify_counts[stratify_counts < n].index
-    low_counts = df[stratify_col.isin(low_count_groups)]
-    # print(low_counts.shape[0])
-    df = df[~stratify_col.isin(low_count_groups)]
+    # Sort by stratum, random inside each stratum, then deal the sorted rows out to the batches
+    order = np.lexsort((rng.random(size), codes))
+    labels = np.empty(size, dtype=np.int64)
+    labels[order] = (np.arange(size) + rng.integers(n)) % n
 
-    batches = []
-    batch_size = len(df) // n
+    return labels
 
-    for i in range(n):
-        stratify_col = df[columns].astype(str).agg('-'.join, axis=1)
 
-        if i == n - 1:
-            batch = df
+def stratified_split(df, columns, n: int = 20, random_state=None):
+    """
+    Stratified split a dataframe into n batches. A default of 20 is used when no amount is specified.
+    :param df: pandas.dataframe
+    :param columns: list of columns to stratify by
+    :param n: amount of batches
+    :param random_state: seed or numpy Generator, random when not specified
+    :return: batchified dataframes
+    """
 
-        else:
-            df, batch = train_test_split(df, test_size=batch_size, stratify=stratify_col)
+    rng = np.random.default_rng(random_state)
+    labels = assign_batches(df, columns, n, random_state=rng)
 
-        batches.append(batch)
+    # Shuffle so rows are not grouped by stratum inside a batch, then group the positions by batch
+    positions = rng.permutation(len(df))
+    positions = positions[np.argsort(labels[positions], kind='stable')]
+    bounds = np.searchsorted(labels[positions], np.arange(1, n))
 
-    low_count_per_batch = len(low_counts) // n
-    remainder = len(low_counts) % n
-    start = 0
+    return [df.iloc[batch].reset_index(drop=True) for batch in np.split(positions, bounds)]
 
-    for i in range(n):
-        end = start + low_count_per_batch
-        if i < remainder:
-            end += 1
-        batch_low_counts = low_counts.iloc[start:end]
-        batches[i] = pd.concat([batches[i], batch_low_counts], ignore_index=True)
-        start = end
 
-    return batches
+def batch_counts(df, columns, batch_column='BATCH'):
+    """
+    Per batch value counts of the stratify columns, computed once from the batched dataframe.
+    :param df: pandas.DataFrame with a batch number column
+    :param columns: list of columns to count
+    :param batch_column: column holding the batch numbers
+    :return: dict of column -> dataframe with one row per value and one column per batch
+    """
+    return {col: pd.crosstab(df[col].astype(str), df[batch_column]) for col in columns}
 
 
-def plot_batches(batches, columns, source, save_dir='plots'):
+def plot_batch_counts(counts, source, batches=None, save_dir='plots', dpi: int = 300, fmt: str = 'png',
+                      combined: bool = False):
     """
-    Plot specified columns for each batch and save the plots to files.
-    :param batches: list of pandas.DataFrame
-    :param columns: list of columns to plot
-    :param source:
+    Plot precomputed batch value counts, one figure per batch with a subplot per column. The plotting libraries are
+    only imported here, so this can run in a worker process after the sample files are written.
+    :param counts: output of batch_counts
+    :param source: prefix of the file names
+    :param batches: batch numbers to plot, every batch when not specified
     :param save_dir: directory to save the plots
+    :param dpi: resolution of the saved figures
+    :param fmt: image format of the saved figures, ignored for a combined report
+    :param combined: save every batch as a page of a single pdf report instead of one image per batch
+    :return: list of saved files
     """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from matplotlib.backends.backend_pdf import PdfPages
 
     # Create save directory if it doesn't exist
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
 
-    for i, batch in enumerate(batches):
-        # print(f"Saving plots for Batch {i + 1}")
-        plt.figure(figsize=(20, 15))
+    if batches is None:
+        batches = sorted({batch for table in counts.values() for batch in table.columns})
 
-        # Track the position for subplots
-        subplot_index = 1
+    report = None
+    saved = []
+    if combined:
+        report_filename = os.path.join(save_dir, f'{source}batches.pdf')
+        report = PdfPages(report_filename)
+        saved.append(report_filename)
 
-        for col in columns:
-            plt.subplot(len(columns), 1, subplot_index)  # Create subplot for each column
-            custom_x_values = sorted(batch[col].astype(str).unique())  # Sort the unique values
+    for batch in batches:
+        fig = plt.figure(figsize=(20, 15))
 
-            if pd.api.types.is_numeric_dtype(batch[col]):
-                # Count values and reindex with custom x-values
-                counts = batch[col].value_counts().reindex(custom_x_values, fill_value=0)
-                ax = sns.barplot(x=custom_x_values, y=counts.values, color='blue')
-                plt.ylabel('Count')
-            else:
-                ax = sns.countplot(x=batch[col].astype(str), order=custom_x_values, color='blue')
-                plt.ylabel('Frequency')
+        for subplot_index, (col, table) in enumerate(counts.items(), start=1):
+            plt.subplot(len(counts), 1, subplot_index)  # Create subplot for each column
+            values = table[batch] if batch in table.columns else pd.Series(dtype=int)
+            values = values[values > 0]
 
-            plt.title(f'Batch {i + 1} - {col}')
+            ax = sns.barplot(x=values.index.tolist(), y=values.to_numpy(), color='blue')
+            plt.ylabel('Frequency')
+            plt.title(f'Batch {batch} - {col}')
             plt.xlabel(col)
 
             for p in ax.patches:
                 ax.annotate(
-                    f'{p.get_height()}',
+                    f'{int(p.get_height())}',
                     (p.get_x() + p.get_width() / 2., p.get_height()),
                     ha='center', va='baseline',
                     fontsize=10, color='black', xytext=(0, 3),
                     textcoords='offset points'
                 )
 
-            # plt.xticks(rotation=45)
-            subplot_index += 1
-            # print(col, "PLOTTED")
-
         plt.tight_layout()  # Adjust layout to prevent overlap
 
-        # Save the plot
-        plot_filename = os.path.join(save_dir, f'{source}batch_{i + 1}.png')
-        plt.savefig(plot_filename, format='png', dpi=300, bbox_inches='tight', pad_inches=0.1)
-        plt.close()  # Close the figure to free memory
+        if report is not None:
+            report.savefig(fig, dpi=dpi, bbox_inches='tight')
+        else:
+            plot_filename = os.path.join(save_dir, f'{source}batch_{batch}.{fmt}')
+            plt.savefig(plot_filename, format=fmt, dpi=dpi, bbox_inches='tight', pad_inches=0.1)
+            saved.append(plot_filename)
+        plt.close(fig)  # Close the figure to free memory
+
+    if report is not None:
+        report.close()
+
+    return saved
+
+
+def plot_batches(batches, columns, source, save_dir='plots', **options):
+    """
+    Plot specified columns for each batch and save the plots to files.
+    :param batches: list of pandas.DataFrame
+    :param columns: list of columns to plot
+    :param source: prefix of the file names
+    :param save_dir: directory to save the plots
+    :param options: dpi, fmt and combined, see plot_batch_counts
+    """
+    counts = {
+        col: pd.concat(
+            [batch[col].astype(str).value_counts().rename(i + 1) for i, batch in enumerate(batches)], axis=1
+        ).fillna(0).astype(int).sort_index()
+        for col in columns
+    }
+    return plot_batch_counts(counts, source, save_dir=save_dir, **options)
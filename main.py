@@ -5,28 +5,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import PyQt5.QtWidgets as qtw
-import pandas as pd
-import json
 
 from tkinter import filedialog
-from vendor import Tarrance, Baselice, I360
+from lazy import lazy_import
+from worker import Worker, JobQueue
 
-
-def load_json_file(filename):
-    data = {}
-    with open('replacement_headers.json', 'r') as file:
-        data = json.load(file)
-    try:
-        with open(filename, 'r') as file:
-            data.update(json.load(file))
-    except FileNotFoundError:
-        print(f"Error: {filename} not found.")
-        return {}
-    except json.JSONDecodeError:
-        print(f"Error: Failed to decode JSON from {filename}.")
-        return {}
-
-    return data
+# pandas and everything the pipeline needs load the first time it is used, after the window is up
+pipeline = lazy_import('pipeline')
 
 
 def get_checked_headers(checkbox_dict: dict[any, qtw.QCheckBox]):
@@ -48,6 +33,11 @@ class MainWindow(qtw.QWidget):
         self.json_filename = None
         self.file_path = None
         self.process_data_btn = None
+        self.progress_bar = None
+        self.status_label = None
+        self.queue_label = None
+        self.header_worker = None
+        self.job_queue = JobQueue(self)
         self.join_path_label = None
         self.path_label = None
         self.vendor_label = None
@@ -55,11 +45,14 @@ class MainWindow(qtw.QWidget):
         self.landline_radio = None
         self.mixed_radio = None
         self.radio_buttons_layout = None
+        self.plot_checkbox = None
+        self.plot_report_checkbox = None
+        self.trace_checkbox = None
         self.vendor_combo_box = None
         self.candidate_names_text_box = None
-        self.df_initialized = False
         self.join_file_path = None
-        self.df = pd.DataFrame()
+        self.header_job = None
+        self.df = None
         self.setWindowTitle("Sample Automation")
         self.setLayout(qtw.QHBoxLayout())
 
@@ -85,6 +78,17 @@ class MainWindow(qtw.QWidget):
         self.radio_buttons_layout.addWidget(self.landline_radio)
         self.radio_buttons_layout.addWidget(self.cell_radio)
 
+        # Batch plots are drawn in the background after the files are written, on by default for I360 only
+        self.plot_checkbox = qtw.QCheckBox("Plot Batches")
+        self.plot_report_checkbox = qtw.QCheckBox("Single Plot Report")
+
+        self.radio_buttons_layout.addWidget(self.plot_checkbox)
+        self.radio_buttons_layout.addWidget(self.plot_report_checkbox)
+
+        # Saves the time and memory of every stage to SAMPLE/auto/ and shows the slowest ones when done
+        self.trace_checkbox = qtw.QCheckBox("Trace Stages")
+        self.radio_buttons_layout.addWidget(self.trace_checkbox)
+
         # Add the radio buttons layout to the left side
         main_layout.addLayout(self.radio_buttons_layout)
 
@@ -99,6 +103,9 @@ class MainWindow(qtw.QWidget):
 
         for vendor in vendors:
             self.vendor_combo_box.addItem(vendor)
+        self.vendor_combo_box.currentTextChanged.connect(
+            lambda vendor: self.plot_checkbox.setChecked(vendor == 'I360')
+        )
         initial_layout.addWidget(self.vendor_combo_box)
 
         self.candidate_names_text_box = qtw.QTextEdit(
@@ -126,10 +133,10 @@ class MainWindow(qtw.QWidget):
 
         # Create a layout for the join path button, label, and clear button
         join_path_layout = qtw.QHBoxLayout()
-        join_path_btn = qtw.QPushButton("Join File", clicked=lambda: self.get_join_file_path())
+        join_path_btn = qtw.QPushButton("Join Files", clicked=lambda: self.get_join_file_path())
         join_path_layout.addWidget(join_path_btn)
 
-        self.join_path_label = qtw.QLabel("Select a file to join")
+        self.join_path_label = qtw.QLabel("Select files to join")
         join_path_layout.addWidget(self.join_path_label)
 
         clear_join_path_btn = qtw.QPushButton("Clear", clicked=self.clear_join_file_path)
@@ -138,6 +145,9 @@ class MainWindow(qtw.QWidget):
         join_path_layout.addStretch()  # Add stretch to push button to the right
         initial_layout.addLayout(join_path_layout)
 
+        clear_cache_btn = qtw.QPushButton("Clear Cache", clicked=self.clear_cache)
+        initial_layout.addWidget(clear_cache_btn)
+
         check_headers_btn = qtw.QPushButton("Check Headers", clicked=self.check_headers)
         initial_layout.addWidget(check_headers_btn)
 
@@ -147,74 +157,133 @@ class MainWindow(qtw.QWidget):
         self.process_data_btn = qtw.QPushButton("Process Data", clicked=self.select_vendor)
         initial_layout.addWidget(self.process_data_btn)
 
+        # Progress of the running job, the jobs waiting behind it and a cancel button
+        progress_layout = qtw.QHBoxLayout()
+        self.progress_bar = qtw.QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        progress_layout.addWidget(self.progress_bar)
+
+        cancel_btn = qtw.QPushButton("Cancel", clicked=self.cancel_job)
+        progress_layout.addWidget(cancel_btn)
+        initial_layout.addLayout(progress_layout)
+
+        self.status_label = qtw.QLabel("Idle")
+        initial_layout.addWidget(self.status_label)
+
+        self.queue_label = qtw.QLabel("Queued jobs: 0")
+        initial_layout.addWidget(self.queue_label)
+        self.job_queue.changed.connect(lambda pending: self.queue_label.setText(f"Queued jobs: {pending}"))
+
         main_layout.addLayout(initial_layout)
         self.layout().addLayout(main_layout)
 
         # Define the methods to clear each file path
     def clear_file_path(self):
+        self.file_path = None
         self.path_label.setText("Select a file to begin")
 
     def clear_join_file_path(self):
-        self.join_path_label.setText("Select a file to join")
+        self.join_file_path = None
+        self.join_path_label.setText("Select files to join")
+
+    def clear_cache(self):
+        try:
+            self.build_pipeline().invalidate_cache()
+            pipeline.stage_memo().clear()
+            self.status_label.setText("Cache cleared")
+        except Exception as e:
+            print(traceback.format_exc(), e)
+
+    def build_pipeline(self, **kwargs):
+        candidate_names = self.candidate_names_text_box.toPlainText().split("\n")
+        return pipeline.Pipeline(
+            self.vendor_combo_box.currentText(),
+            self.file_path,
+            join_file_path=self.join_file_path,
+            source=self.get_source(),
+            candidate_names=candidate_names,
+            save_path=self.save_path,
+            project_number=self.project_number,
+            plot=self.plot_checkbox.isChecked(),
+            plot_combined=self.plot_report_checkbox.isChecked(),
+            trace=self.trace_checkbox.isChecked(),
+            **kwargs
+        )
 
     def check_headers(self):
 
         vendor_selection = self.vendor_combo_box.currentText()
-        json_filename_map = {
-            'Tarrance': 'tarrance_replacement.json',
-            'Baselice': 'baselice_replacement.json',
-            'I360': 'i360_replacement.json'
-        }
-        self.json_filename = json_filename_map.get(vendor_selection)
+        self.json_filename = pipeline.JSON_FILENAME_MAP.get(vendor_selection)
 
         try:
-            self.get_data()
-            if self.json_filename:
-                self.replace_header_names()
-                # Update any necessary UI elements or state
-            else:
-                print("Vendor not supported or not selected.")
-            self.display_column_headers()
+            job = self.build_pipeline()
+
+            # Only a sample is read here, the full file is read once when processing
+            def task(report):
+                job.progress = report
+                job.sniff()
+                job.map_headers()
+                return job
+
+            self.run_header_task(task, "Check Headers")
         except Exception as e:
             print(traceback.format_exc(), e)
 
     def update_headers(self):
         try:
-            self.rename_columns()
-            self.replace_header_names()
-            self.display_column_headers()
-        except Exception as e:
-            print(traceback.format_exc(), e)
+            job = self.build_pipeline(df=self.df, renames=self.header_renames())
+            job.source_columns = self.header_job.source_columns
 
-    def replace_header_names(self):
-        column_names_to_check = load_json_file(self.json_filename)
-        # print(column_names_to_check)
-        # print(self.df.columns)
-        for replacement, check_list in column_names_to_check.items():
-            for check in check_list:
-                if check in self.df.columns:
-                    self.df.rename(columns={check: replacement}, inplace=True)
+            def task(report):
+                job.progress = report
+                job.map_headers()
+                return job
 
-        self.df['FNAME'] = self.df['FNAME'].astype(str)
-        self.df['LNAME'] = self.df['LNAME'].astype(str)
-        self.df['FULL_NAME'] = self.df['FNAME'] + ' ' + self.df['LNAME']
-
-        candidate_names = self.candidate_names_text_box.toPlainText().split("\n")
-        candidate_names = [name.strip().upper() for name in candidate_names if name.strip()]
-
-        if candidate_names:
-            self.df = self.df[~self.df['FULL_NAME'].isin(candidate_names)].reset_index(drop=True)
+            self.run_header_task(task, "Update Headers")
+        except Exception as e:
+            print(traceback.format_exc(), e)
 
-        if 'FULL_NAME' in self.df.columns:
-            self.df.drop(columns=['FULL_NAME'], inplace=True)
+    def run_header_task(self, task, name):
+        if self.header_worker is not None and self.header_worker.isRunning():
+            self.status_label.setText(f"{self.header_worker.name} is still running")
+            return
+
+        self.header_worker = Worker(task, name)
+        self.connect_worker(self.header_worker)
+        self.header_worker.result.connect(self.headers_loaded)
+        self.header_worker.start()
+
+    def headers_loaded(self, job):
+        self.header_job = job
+        self.df = job.df
+        self.display_column_headers()
+        self.status_label.setText("Headers loaded")
+        self.progress_bar.setValue(100)
+
+    def connect_worker(self, worker):
+        worker.progress.connect(lambda stage, percent: self.show_progress(worker.name, stage, percent))
+        worker.error.connect(self.show_error)
+        worker.cancelled.connect(lambda: self.status_label.setText(f"{worker.name} cancelled"))
+
+    def show_progress(self, name, stage, percent):
+        self.status_label.setText(f"{name}: {stage}")
+        self.progress_bar.setValue(percent)
+
+    def show_error(self, message):
+        print(message)
+        self.status_label.setText("Failed, see the console for details")
+
+    def cancel_job(self):
+        if self.header_worker is not None and self.header_worker.isRunning():
+            self.header_worker.cancel()
+        self.job_queue.cancel_current()
 
     def get_file_path(self):
         try:
             self.file_path = filedialog.askopenfilename(initialdir=os.environ.get("PROJECT_DIRECTORY"))
             self.path_label.setText(self.file_path)
-            self.project_number = os.path.basename(os.path.dirname(os.path.dirname(self.file_path)))
+            self.project_number, self.save_path = pipeline.project_paths(self.file_path)
             self.project_sample_directory = f'{os.environ.get("PROJECT_DIRECTORY")}/{self.project_number}/SAMPLE/'
-            self.save_path = f'{os.environ.get("PROJECT_DIRECTORY")}/{self.project_number}/SAMPLE/auto/'
 
             if not os.path.exists(self.save_path):
                 os.makedirs(self.save_path)
@@ -224,119 +293,48 @@ class MainWindow(qtw.QWidget):
         return self.file_path
 
     def get_join_file_path(self):
-        self.join_file_path = filedialog.askopenfilename(initialdir=os.environ.get("PROJECT_DIRECTORY"))
-        self.join_path_label.setText(self.join_file_path)
+        self.join_file_path = list(filedialog.askopenfilenames(initialdir=os.environ.get("PROJECT_DIRECTORY")))
+        self.join_path_label.setText(", ".join(os.path.basename(path) for path in self.join_file_path))
         return self.join_file_path
 
-    def get_data(self):
-        if not self.file_path:
-            raise "File path is required"
-
-        self.df_initialized = False
-        file_type = self.file_path.split(".")[-1]
-        match file_type:
-            case 'xlsx' | 'xls':
-                print('xlsx')
-                self.df = pd.read_excel(self.file_path)
-                self.df = self.df.astype(str)
-            case 'csv':
-                print('csv')
-                self.df = pd.read_csv(self.file_path, dtype=str)
-            case 'txt' | 'TXT':
-                print('txt')
-                self.df = pd.read_csv(self.file_path, delimiter="\t", dtype=str)
-            case _:
-                raise f"File type not supported"
-
-        if self.join_file_path:
-            file_type = self.join_file_path.split(".")[-1]
-            match file_type:
-                case 'xlsx' | 'xls':
-                    print('xlsx')
-                    join_df = pd.read_excel(self.join_file_path)
-                    join_df = join_df.astype(str)
-                case 'csv':
-                    print('csv')
-                    join_df = pd.read_csv(self.join_file_path, dtype=str)
-                case 'txt' | 'TXT':
-                    print('txt')
-                    join_df = pd.read_csv(self.join_file_path, delimiter="\t", dtype=str)
-                case _:
-                    raise f"File type not supported"
-
-            self.df = pd.concat([self.df, join_df], ignore_index=True)
-            self.df.to_csv('joined.csv', index=False)
-            self.join_file_path = None
-
-        self.df.columns = [col.upper() for col in self.df.columns]
-
-        with open('deletion_headers.json', 'r') as file:
-            columns_to_delete = json.load(file)
-
-        columns_to_delete_in_df = [col for col in columns_to_delete if col in self.df.columns]
-
-        self.df = self.df.drop(columns=columns_to_delete_in_df)
+    def get_source(self):
+        if self.landline_radio.isChecked():
+            return 'LANDLINE'
+        if self.cell_radio.isChecked():
+            return 'CELL'
+        return 'MIXED'
 
     def select_vendor(self):
         try:
-            vendor_selection = self.vendor_combo_box.currentText()
             checked_headers = get_checked_headers(self.header_checkboxes)
-            vendor_map = {
-                'Tarrance': Tarrance,
-                'Baselice': Baselice,
-                'I360': I360
-            }
-            VendorClass = vendor_map.get(vendor_selection)
-            if self.df.get("CFIPS") is not None:
-                self.df['CFIPS'] = self.df['CFIPS'].astype(str).str.pad(3, fillchar='0')  # This is here because it is the same code width between all vendors
-            if self.df.get("HD") is not None:
-                self.df['HD'] = self.df['HD'].astype(str).str.pad(3, fillchar='0')
-            if self.df.get("CD") is not None:
-                self.df['CD'] = self.df['CD'].astype(str).str.pad(2, fillchar='0')  # This is here because it is the same code width between all vendors
-            if VendorClass:
-                if vendor_selection == 'I360':
-                    if self.landline_radio.isChecked():
-                        source = 'LANDLINE'
-                    elif self.cell_radio.isChecked():
-                        source = 'CELL'
-                    else:
-                        raise ValueError("Please select a source")
-                    vendor = VendorClass(self.df, checked_headers, source=source)
-                    if source == "LANDLINE":
-                        for group, num in vendor.groups.items():
-                            num.to_csv(f'{self.save_path}{group}.csv', index=False)
-                else:
-                    vendor = VendorClass(self.df, checked_headers)
-
-                if vendor:
-                    self.save_file(vendor)
-                # Process data with the vendor instance
-            else:
-                print("Vendor not supported or not selected.")
-
-            print("Finished processing")
+            header_map = self.header_job.mapped_headers()
+            job = self.build_pipeline(header_map=header_map, stratify_by=checked_headers)
+
+            def task(report):
+                job.progress = report
+                job.load()
+                job.process()
+                job.output()
+                job.plot_batches()
+                job.write_trace()
+                return job
+
+            worker = Worker(task, f"Process {job.project_number}")
+            self.connect_worker(worker)
+            worker.result.connect(self.processing_finished)
+            self.job_queue.enqueue(worker)
         except Exception as e:
             print(traceback.format_exc(), e)
 
-    def save_file(self, vendor):
-        vendor.get_area_codes().to_csv(f"{self.save_path}{self.project_number}_AREACODES.csv")
-
-        def save_with_counter(base_path, data):
-            count = 0
-            while True:
-                path = f"{base_path}{count if count > 0 else ''}.csv"
-                if not os.path.exists(path):
-                    data.to_csv(path, index=False)
-                    break
-                count += 1
-
-        if not self.landline_radio.isChecked() and not self.cell_radio.isChecked():
-            save_with_counter(f'{self.save_path}{self.project_number}LSAM', vendor.final_landline)
-            save_with_counter(f'{self.save_path}{self.project_number}CSAM', vendor.final_cell)
-        elif self.landline_radio.isChecked():
-            save_with_counter(f'{self.save_path}{self.project_number}LSAM', vendor.final_df)
-        elif self.cell_radio.isChecked():
-            save_with_counter(f'{self.save_path}{self.project_number}CSAM', vendor.final_df)
+    def processing_finished(self, job):
+        print("Finished processing")
+        if job.tracer is not None and job.tracer.spans:
+            self.status_label.setText(f"Finished processing {job.project_number} in {job.tracer.headline()}")
+            self.status_label.setToolTip(f"<pre>{job.tracer.summary()}</pre>")
+        else:
+            self.status_label.setText(f"Finished processing {job.project_number}")
+            self.status_label.setToolTip('')
+        self.progress_bar.setValue(100)
 
     def display_column_headers(self):
         # Create a new layout for column headers
@@ -352,7 +350,7 @@ class MainWindow(qtw.QWidget):
         scroll_area.setWidget(header_container)
 
         # Clear any existing column header widgets
-        if hasattr(self, 'header_widget_container'):
+        if self.header_widget_container is not None:
             self.layout().removeWidget(self.header_widget_container)
             self.header_widget_container.deleteLater()
 
@@ -383,43 +381,20 @@ class MainWindow(qtw.QWidget):
             self.header_text_boxes[column] = text_box
             self.header_checkboxes[column] = checkbox
 
-    def rename_columns(self):
-        # Create a dictionary to map old column names to new names
-        original_columns = list(self.df.columns)
-        new_columns = {}
-
-        for old_name, text_box in self.header_text_boxes.items():
-            new_name = text_box.text().strip()
-            if new_name and new_name != old_name:  # Only add if new name is different and non-empty
-                new_columns[old_name] = new_name
-
-        # Rename only the columns that have changed names
-        if new_columns:
-            self.df.rename(columns=new_columns, inplace=True)
+    def header_renames(self):
+        return {old_name: text_box.text() for old_name, text_box in self.header_text_boxes.items()}
 
     @property
-    def df(self) -> pd.DataFrame:
+    def df(self):
         return self._df
 
     @df.setter
-    def df(self, df: pd.DataFrame = pd.DataFrame()):
-        if not self.df_initialized:
-            zero = '0' * 10
-            df['CALLIDL1'] = zero
-            df['CALLIDL2'] = zero
-            df['CALLIDC1'] = zero
-            df['CALLIDC2'] = zero
-            df['TFLAG'] = 0
-            df['VEND'] = 5
-            df['VTYPE'] = ''
-            df['MD'] = ''
-            df['BATCH'] = ''
-            self.df_initialized = True
-
+    def df(self, df):
         self._df = df
 
 
-app = qtw.QApplication([])
-mw = MainWindow()
-app.exec_()
+if __name__ == "__main__":
+    app = qtw.QApplication([])
+    mw = MainWindow()
+    app.exec_()
 
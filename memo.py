@@ -0,0 +1,71 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Prepared vendor frames kept in memory, the least recently used are dropped first. Every entry holds about one copy
+# of a sample, the final frames of its job, so the default keeps the last two jobs.
+MEMO_ENTRIES = int(os.environ.get("STAGE_MEMO_ENTRIES", 2))
+
+_memo = None
+
+
+def stage_key(*parts):
+    """
+    Content key of a stage: the key of its input and every parameter that changes its output.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class StageMemo:
+    """
+    In-memory results of pipeline stages by content key. Processing the same sample again with only the stratify
+    columns changed finds the prepared frames here, skips reading the file and only batches and writes.
+    The stored values are shared, the stages that use them must not modify them in place.
+    """
+
+    def __init__(self, max_entries: int = MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """
+        :return: the stored value, None on a miss
+        """
+        with self._lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+def stage_memo():
+    """
+    Memo shared by the jobs of this process.
+    """
+    global _memo
+    if _memo is None:
+        _memo = StageMemo()
+    return _memo
@@ -1,20 +1,30 @@
 import os
-from sqlalchemy import Column, Integer, String, ForeignKey, create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base, relationship
+import time
+import threading
+from sqlalchemy import Column, Integer, String, ForeignKey, create_engine, select, and_
+from sqlalchemy.orm import sessionmaker, declarative_base, relationship, aliased
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
     load_dotenv()
 
-# Ensure that the environment variable is set
-uri = os.environ.get('db_uri')
-assert uri is not None, "Please set the db_uri environment variable"
+# Connection pool of server databases, SQLite keeps the pool sqlalchemy picks for it
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+POOL_RECYCLE = 3600
 
-# Initialize the base class and engine
+# Seconds a vendor spec is served from memory before it is loaded again
+SPEC_CACHE_TTL = float(os.environ.get("MAPPING_CACHE_TTL", 300))
+
+# Initialize the base class, the engine is created on first use
 Base = declarative_base()
-engine = create_engine(uri)
-Session = sessionmaker(bind=engine)
-session = Session()
+Session = sessionmaker()
+
+_engine = None
+_lock = threading.Lock()
+
+# vendor name -> (time loaded, VendorSpec)
+_specs = {}
 
 
 # Vendors Table
@@ -84,18 +94,140 @@ class VendorHeaderPadding(Base):
         return f'<VendorHeaderPadding(vendor_id={self.vendor_id}, header_id={self.header_id}, padding_spec={self.padding_spec})>'
 
 
+def get_engine(uri=None):
+    """
+    Engine for uri, the db_uri environment variable when not specified. Created on first use and shared by every
+    session afterwards, pass a uri to replace it, e.g. 'sqlite://' for a local stand-in.
+    """
+    global _engine
+    with _lock:
+        if _engine is not None and uri is None:
+            return _engine
+
+        uri = uri or os.environ.get('db_uri')
+        assert uri is not None, "Please set the db_uri environment variable"
+
+        if _engine is not None:
+            _engine.dispose()
+        if uri.startswith('sqlite'):
+            _engine = create_engine(uri)
+        else:
+            _engine = create_engine(
+                uri, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_recycle=POOL_RECYCLE, pool_pre_ping=True
+            )
+        Session.configure(bind=_engine)
+        clear_cache()
+        return _engine
+
+
+def get_session():
+    get_engine()
+    return Session()
+
+
+class VendorSpec:
+    """
+    Everything the pipeline needs from the database for one vendor.
+    replacements: canonical header -> aliases, in the same shape as the replacement json files
+    padding: canonical header -> width
+    """
+
+    def __init__(self, vendor_name, replacements=None, padding=None):
+        self.vendor_name = vendor_name
+        self.replacements = replacements or {}
+        self.padding = padding or {}
+
+    def __repr__(self):
+        return f"<VendorSpec(vendor_name={self.vendor_name}, headers={len(self.replacements)}, padding={len(self.padding)})>"
+
+
+def fetch_vendor_spec(vendor_name, session=None):
+    """
+    Load the header mapping and padding spec of a vendor in a single query. Every derived header is listed under its
+    own header, unless a VendorDerivedHeaderMapping row of the vendor points it at another header.
+    :param vendor_name: tblVendors.vendor_name
+    :param session: session to query with, a new one when not specified
+    :return: VendorSpec
+    :raises ValueError: when the vendor is not in tblVendors
+    """
+    vendor_id = select(Vendors.vendor_id).where(Vendors.vendor_name == vendor_name).scalar_subquery()
+    mapped = aliased(Headers)
+    query = (
+        select(
+            Headers.header_name, DerivedHeaders.derived_header, mapped.header_name, VendorHeaderPadding.padding_spec,
+            vendor_id
+        )
+        .outerjoin(DerivedHeaders, DerivedHeaders.header_id == Headers.header_id)
+        .outerjoin(VendorDerivedHeaderMapping, and_(
+            VendorDerivedHeaderMapping.derived_id == DerivedHeaders.derived_id,
+            VendorDerivedHeaderMapping.vendor_id == vendor_id
+        ))
+        .outerjoin(mapped, mapped.header_id == VendorDerivedHeaderMapping.mapped_header_id)
+        .outerjoin(VendorHeaderPadding, and_(
+            VendorHeaderPadding.header_id == Headers.header_id,
+            VendorHeaderPadding.vendor_id == vendor_id
+        ))
+        .order_by(Headers.header_id, DerivedHeaders.derived_id)
+    )
+
+    own_session = session is None
+    session = get_session() if own_session else session
+    try:
+        rows = session.execute(query).all()
+        # Every row carries the vendor id, the lookup only runs when there are no headers at all
+        if rows:
+            known = rows[0][-1] is not None
+        else:
+            known = session.execute(select(Vendors.vendor_id).where(Vendors.vendor_name == vendor_name)).first()
+    finally:
+        if own_session:
+            session.close()
+
+    if not known:
+        raise ValueError(f"Unknown vendor {vendor_name!r}, it is not in {Vendors.__tablename__}")
+
+    spec = VendorSpec(vendor_name)
+    for header_name, derived_header, mapped_name, padding_spec, _ in rows:
+        if padding_spec is not None:
+            spec.padding[header_name] = padding_spec
+        if derived_header:
+            aliases = spec.replacements.setdefault(mapped_name or header_name, [])
+            if derived_header not in aliases:
+                aliases.append(derived_header)
+    return spec
+
+
+def load_vendor_spec(vendor_name, ttl=None):
+    """
+    VendorSpec from the process wide cache, fetched again once it is older than ttl seconds.
+    :param ttl: seconds, SPEC_CACHE_TTL when not specified
+    """
+    ttl = SPEC_CACHE_TTL if ttl is None else ttl
+    cached = _specs.get(vendor_name)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+
+    spec = fetch_vendor_spec(vendor_name)
+    _specs[vendor_name] = (time.monotonic(), spec)
+    return spec
+
+
+def clear_cache():
+    _specs.clear()
+
+
 def create_tables():
-    Base.metadata.create_all(engine)
+    Base.metadata.create_all(get_engine())
 
 
 def drop_tables():
-    Base.metadata.drop_all(engine)
+    Base.metadata.drop_all(get_engine())
 
 
 def add_vendor(vendor_name):
-    vendor = Vendors(vendor_name=vendor_name)
-    session.add(vendor)
-    session.commit()
+    with get_session() as session:
+        session.add(Vendors(vendor_name=vendor_name))
+        session.commit()
 
 
 if __name__ == "__main__":
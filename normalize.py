@@ -0,0 +1,179 @@
+import json
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+from phones import phone_column
+
+NORMALIZATION_FILENAME = 'normalization.json'
+
+# Key of the normalization.json entry applied to every vendor
+COMMON = 'COMMON'
+
+
+class ColumnSpec:
+    """
+    How to normalize one column: strip surrounding whitespace, uppercase, then left pad to width with fillchar.
+    Padding converts the values to strings first, so missing values become 'nan' as with astype(str).
+    Phone columns are converted to int64 instead, see phones.phone_column.
+    """
+
+    def __init__(self, width=None, fillchar='0', strip=False, upper=False, phone=False):
+        self.width = width
+        self.fillchar = fillchar
+        self.strip = strip
+        self.upper = upper
+        self.phone = phone
+
+    @classmethod
+    def from_json(cls, value):
+        """
+        :param value: width, or a dict with width, fill, strip, upper and phone
+        """
+        if isinstance(value, int):
+            return cls(width=value)
+        return cls(
+            width=value.get('width'),
+            fillchar=value.get('fill', '0'),
+            strip=value.get('strip', False),
+            upper=value.get('upper', False),
+            phone=value.get('phone', False)
+        )
+
+    def __repr__(self):
+        return (f"<ColumnSpec(width={self.width}, fillchar={self.fillchar}, strip={self.strip}, upper={self.upper}, "
+                f"phone={self.phone})>")
+
+    def apply_arrow(self, column: pd.Series):
+        """
+        Run every step over one Arrow string array, converting the column once in each direction.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        values = pa.array(column.to_numpy(dtype=object), from_pandas=True, type=pa.string())
+        if self.width is not None:
+            values = pc.fill_null(values, 'nan')
+        if self.strip:
+            values = pc.utf8_trim_whitespace(values)
+        if self.upper:
+            values = pc.utf8_upper(values)
+        if self.width is not None:
+            values = pc.utf8_lpad(values, width=self.width, padding=self.fillchar)
+
+        result = pd.Series(values.to_pandas(), index=column.index, name=column.name)
+        if values.null_count:
+            result = result.where(result.notna(), np.nan)
+        return result
+
+    def apply_pandas(self, column: pd.Series):
+        if self.width is not None:
+            column = column.astype(str)
+        if self.strip:
+            column = column.str.strip()
+        if self.upper:
+            column = column.str.upper()
+        if self.width is not None:
+            column = column.str.pad(self.width, fillchar=self.fillchar)
+        return column
+
+    def apply_categorical(self, column: pd.Series):
+        """
+        Run the spec over the categories only, then rebuild the column from its codes. Categories that normalize
+        to the same value are merged.
+        """
+        codes = column.cat.codes.to_numpy()
+        categories = column.cat.categories
+        if (codes < 0).any():
+            categories = categories.append(pd.Index([np.nan], dtype=object))
+            codes = np.where(codes < 0, len(categories) - 1, codes)
+        values = self.apply(pd.Series(categories.to_numpy(dtype=object), name=column.name)).to_numpy()
+        new_codes, uniques = pd.factorize(values, sort=True)
+        return pd.Series(
+            pd.Categorical.from_codes(new_codes[codes], uniques), index=column.index, name=column.name
+        )
+
+    def apply(self, column: pd.Series):
+        if self.phone:
+            return phone_column(column)[0]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return self.apply_categorical(column)
+        # Numeric columns keep the pandas path so they are formatted exactly like astype(str)
+        if column.dtype == object and importlib.util.find_spec('pyarrow') is not None:
+            try:
+                return self.apply_arrow(column)
+            except (TypeError, ValueError, ImportError):
+                pass
+        return self.apply_pandas(column)
+
+
+class NormalizationSpec:
+    """
+    Column -> ColumnSpec for a vendor. apply runs the whole spec as one pass per column, the columns missing from
+    the frame are skipped.
+    """
+
+    def __init__(self, columns: dict = None):
+        self.columns = dict(columns or {})
+
+    @classmethod
+    def from_widths(cls, widths: dict, fillchar='0'):
+        return cls({col: ColumnSpec(width=width, fillchar=fillchar) for col, width in widths.items()})
+
+    @classmethod
+    def from_json(cls, vendor, filename=NORMALIZATION_FILENAME):
+        """
+        COMMON entry of normalization.json updated with the vendor entry.
+        """
+        with open(filename, 'r') as file:
+            data = json.load(file)
+        spec = {}
+        for key in (COMMON, vendor):
+            spec.update({col: ColumnSpec.from_json(value) for col, value in data.get(key, {}).items()})
+        return cls(spec)
+
+    @classmethod
+    def from_db(cls, vendor, filename=NORMALIZATION_FILENAME):
+        """
+        The json spec with the widths of the vendor's VendorHeaderPadding rows applied over it.
+        """
+        from models import load_vendor_spec
+
+        spec = cls.from_json(vendor, filename)
+        for col, width in load_vendor_spec(vendor).padding.items():
+            spec.columns.setdefault(col, ColumnSpec()).width = width
+        return spec
+
+    def __repr__(self):
+        return f"<NormalizationSpec(columns={self.columns})>"
+
+    def __call__(self, df):
+        return self.apply(df)
+
+    def apply(self, df):
+        """
+        Normalize the spec columns of df in place. Also usable as an ingest.read_file chunk transform.
+        The rejected values of a phone column are kept in a column added after the others, see phones.phone_column.
+        """
+        for col, column_spec in self.columns.items():
+            if col not in df.columns:
+                continue
+            if column_spec.phone:
+                df[col], invalid = phone_column(df[col])
+                if invalid is not None:
+                    df[invalid.name] = invalid
+            else:
+                df[col] = column_spec.apply(df[col])
+        return df
+
+
+def load_spec(vendor, source='json'):
+    """
+    :param vendor: vendor name, as in pipeline.VENDOR_MAP
+    :param source: 'json' for normalization.json, 'db' to apply the VendorHeaderPadding widths over it
+    :return: NormalizationSpec
+    """
+    if source == 'db':
+        return NormalizationSpec.from_db(vendor)
+    return NormalizationSpec.from_json(vendor)
@@ -0,0 +1,128 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Phone numbers are stored as int64, 0 marks a missing or invalid number
+MISSING = 0
+
+MIN_PHONE = 10 ** 9
+MAX_PHONE = 10 ** 10
+
+# 11 digit numbers starting with the country code are read as the 10 digit number that follows it
+COUNTRY_CODE = 1
+
+# Extension after the number, e.g. 512-555-0100 x12 or ext. 12, dropped before the digits are read
+EXTENSION = r'\s*(?:x|ext\.?|extension)\s*\d+\s*$'
+
+# Column holding the original text of the values of a phone column that are not valid numbers, see phone_column
+INVALID_SUFFIX = '_INVALID'
+
+
+class InvalidPhoneWarning(UserWarning):
+    pass
+
+
+def national(numbers):
+    """
+    Remove the leading country code of 11 digit numbers.
+    """
+    with_code = (numbers >= COUNTRY_CODE * MAX_PHONE) & (numbers < (COUNTRY_CODE + 1) * MAX_PHONE)
+    return np.where(with_code, numbers - COUNTRY_CODE * MAX_PHONE, numbers)
+
+
+def parse_phones(values) -> tuple:
+    """
+    Convert phone numbers to int64. Surrounding whitespace is ignored, and values that are not plain numbers are
+    retried without their extension and with every non digit removed, e.g. (234) 567-8901 x12. A leading country
+    code is removed, e.g. 1-234-567-8901.
+    :param values: pandas.Series or iterable of phone numbers as strings or numbers
+    :return: (int64 numpy array with MISSING where invalid, boolean mask of the valid 10 digit numbers)
+    """
+    series = pd.Series(values, copy=False)
+    if pd.api.types.is_integer_dtype(series.dtype):
+        numbers = national(series.to_numpy(dtype=np.int64))
+        valid = (numbers >= MIN_PHONE) & (numbers < MAX_PHONE)
+        return np.where(valid, numbers, MISSING), valid
+
+    numbers = pd.to_numeric(series, errors='coerce')
+    retry = numbers.isna() & series.notna()
+    if retry.any():
+        text = series[retry].astype(str).str.replace(EXTENSION, '', case=False, regex=True)
+        digits = text.str.replace(r'\D', '', regex=True)
+        numbers[retry] = pd.to_numeric(digits, errors='coerce')
+
+    numbers = national(numbers.to_numpy(dtype=np.float64, na_value=np.nan))
+    valid = (numbers >= MIN_PHONE) & (numbers < MAX_PHONE) & (numbers == np.floor(numbers))
+    return np.where(valid, numbers, MISSING).astype(np.int64), valid
+
+
+def rejected(values, valid) -> np.ndarray:
+    """
+    Mask of the values that hold something other than blanks but are not a valid phone number.
+    """
+    values = pd.Series(values, copy=False)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return ~valid & (values.to_numpy() != MISSING)
+    return ~valid & values.notna().to_numpy() & (values.astype(str).str.strip() != '').to_numpy()
+
+
+def phone_column(column: pd.Series):
+    """
+    int64 copy of a phone column. The values that are not valid numbers are MISSING in the copy, their original text
+    is returned to be kept next to it, and an InvalidPhoneWarning gives their amount.
+    :return: (int64 pandas.Series, object pandas.Series with the rejected values and missing elsewhere, or None when no
+    value was rejected)
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Every category is parsed once
+        codes = column.cat.codes.to_numpy()
+        numbers, valid = parse_phones(pd.Series(column.cat.categories.to_numpy(dtype=object)))
+        numbers, valid = np.where(codes >= 0, numbers[codes], MISSING), (codes >= 0) & valid[codes]
+        values = column.astype(object)
+    else:
+        numbers, valid = parse_phones(column)
+        values = column
+
+    numbers = pd.Series(numbers, index=column.index, name=column.name)
+    mask = rejected(values, valid)
+    if not mask.any():
+        return numbers, None
+
+    invalid = pd.Series(None, index=column.index, name=f"{column.name}{INVALID_SUFFIX}", dtype=object)
+    invalid[mask] = values[mask].astype(str).to_numpy()
+    warnings.warn(
+        f"{int(mask.sum())} {column.name} values are not valid phone numbers, they are kept in {invalid.name}",
+        InvalidPhoneWarning
+    )
+    return numbers, invalid
+
+
+def has_phone(phones) -> np.ndarray:
+    return np.asarray(phones) != MISSING
+
+
+def area_codes(phones) -> np.ndarray:
+    return np.asarray(phones) // 10 ** 7
+
+
+def exchange_codes(phones) -> np.ndarray:
+    return np.asarray(phones) // 10 ** 4 % 1000
+
+
+def area_code_counts(phones: pd.Series, top: int = 5):
+    """
+    Most common area codes of the numbers that are not missing.
+    """
+    phones = phones[has_phone(phones)]
+    codes = pd.Series(area_codes(phones), name=phones.name).value_counts().head(top)
+    codes.index = codes.index.astype(str).rename(phones.name)
+    return codes
+
+
+def format_phones(phones) -> np.ndarray:
+    """
+    10 digit strings for writing, '' for missing numbers.
+    """
+    phones = np.asarray(phones)
+    return np.where(phones != MISSING, phones.astype(str), '').astype(object)
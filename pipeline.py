@@ -0,0 +1,631 @@
+import argparse
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import IngestCache, cache_dir_for, fingerprint
+from exclusion import NameExclusion
+from header_map import compile_header_map, load_header_map
+from instrument import NULL_SPAN, Tracer, span
+from ingest import read_file, categorize, input_files, concat_frames, load_deletion_headers
+from machine_learning import batch_counts, plot_batch_counts
+from memo import stage_key, stage_memo
+from normalize import load_spec
+from schema import OutputSchema
+from vendor import Tarrance, Baselice, I360
+from wdnc import list_version
+from writer import SIDECARS, Output, write_outputs
+
+JSON_FILENAME_MAP = {
+    'Tarrance': 'tarrance_replacement.json',
+    'Baselice': 'baselice_replacement.json',
+    'I360': 'i360_replacement.json'
+}
+
+VENDOR_MAP = {
+    'Tarrance': Tarrance,
+    'Baselice': Baselice,
+    'I360': I360
+}
+
+SOURCES = ['MIXED', 'LANDLINE', 'CELL']
+
+# Batch plots are drawn in the background by this many worker processes
+PLOT_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+_plot_pool = None
+
+# Rows read when sniffing a file for the header mapping UI
+SAMPLE_ROWS = 100
+
+# Constant columns of every output file, only materialized when the files are written
+DEFAULT_COLUMNS = {
+    'CALLIDL1': '0' * 10,
+    'CALLIDL2': '0' * 10,
+    'CALLIDC1': '0' * 10,
+    'CALLIDC2': '0' * 10,
+    'TFLAG': 0,
+    'VEND': 5,
+    'VTYPE': '',
+    'MD': '',
+    'BATCH': ''
+}
+
+
+# Stored as int64 while processing, see phones.py
+PHONE_COLUMNS = ('PHONE', 'TEL', 'CELL', '$N')
+
+OUTPUT_SCHEMA = OutputSchema(DEFAULT_COLUMNS, PHONE_COLUMNS)
+
+
+def file_header_map(file_path, rename, headers, cache=None):
+    """
+    Header map of one input file derived from the header map of the first file: every column is matched through its
+    canonical header, so files that name the same column differently still line up.
+    :param rename: uppercased header of the first file -> mapped name
+    :param headers: header_map.HeaderMap of the vendor
+    :return: uppercased header of this file -> mapped name
+    """
+    mapped = {headers.aliases.get(col, col): name for col, name in rename.items()}
+    columns = read_file(file_path, nrows=0, cache=cache).columns
+    return {col: mapped[headers.aliases.get(col, col)] for col in columns if headers.aliases.get(col, col) in mapped}
+
+
+def read_input(file_path, nrows=None, usecols=None, rename=None, transforms=(), cache=None, headers=None,
+               memory_report=False):
+    """
+    Read one input file the way it goes into the join: canonical headers, schema columns dropped and low cardinality
+    columns categorical. See get_data for the parameters.
+    """
+    if headers is not None and rename is not None:
+        rename = usecols = file_header_map(file_path, rename, headers, cache)
+    df = read_file(file_path, nrows=nrows, usecols=usecols, rename=rename, transforms=transforms, cache=cache)
+    if headers is not None and rename is None:
+        headers.apply(df)
+
+    df = OUTPUT_SCHEMA.strip(df)
+    if nrows is None:
+        df = categorize(df, report=memory_report)
+    return df
+
+
+def get_data(file_path, join_file_path=None, nrows=None, usecols=None, rename=None, transforms=(), cache=None,
+             memory_report=False, headers=None, dump_path=None, parallel=None):
+    """
+    Read the vendor file and the files joined to it, skipping the columns listed in deletion_headers.json. Every
+    file is mapped to canonical headers before the frames are appended, and several files are read in parallel.
+    :param file_path: csv, txt or xlsx file
+    :param join_file_path: file, directory or list of them to append to the first one, see ingest.input_files
+    :param nrows: amount of rows to read from each file, everything when not specified
+    :param usecols: uppercased header names to read, everything not deleted when not specified
+    :param rename: uppercased header name -> mapped name, applied while reading
+    :param transforms: per chunk transforms, see ingest.read_file
+    :param cache: cache.IngestCache to reuse parsed files from
+    :param memory_report: print the memory saved by the categorical columns
+    :param headers: header_map.HeaderMap applied to each file, the joined files are matched to rename through it
+    :param dump_path: write the joined frame to this csv for debugging
+    :param parallel: read the files in worker processes, decided from the file and cpu count when not specified
+    :return: pandas.DataFrame, low cardinality columns are categorical unless nrows is specified
+    """
+    if not file_path:
+        raise ValueError("File path is required")
+
+    paths = [file_path] + input_files(join_file_path)
+    options = {
+        'nrows': nrows, 'usecols': usecols, 'rename': rename, 'transforms': transforms, 'cache': cache,
+        'headers': headers if len(paths) > 1 else None, 'memory_report': memory_report
+    }
+
+    if parallel is None:
+        parallel = len(paths) > 1 and (os.cpu_count() or 1) > 1
+    with span('read', files=len(paths)) as stage:
+        if parallel:
+            with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as pool:
+                frames = [future.result() for future in [pool.submit(read_input, path, **options) for path in paths]]
+        else:
+            frames = [read_input(path, **options) for path in paths]
+
+        df = concat_frames(frames)
+        stage.rows_out = len(df)
+    if dump_path and nrows is None and len(paths) > 1:
+        df.to_csv(dump_path, index=False)
+    return df
+
+
+def replace_header_names(df, json_filename, headers=None):
+    """
+    Rename vendor headers to their canonical names.
+    :param df: pandas.DataFrame
+    :param json_filename: vendor replacement json
+    :param headers: header_map.HeaderMap to apply, compiled from json_filename when not specified
+    :return: pandas.DataFrame
+    """
+    with span('rename', columns=len(df.columns)):
+        (headers or compile_header_map(json_filename)).apply(df)
+    return df
+
+
+def rename_columns(df, new_columns: dict):
+    """
+    Apply manual header renames, skipping empty or unchanged names.
+    """
+    new_columns = {old: new.strip() for old, new in new_columns.items() if new.strip() and new.strip() != old}
+    if new_columns:
+        df.rename(columns=new_columns, inplace=True)
+    return df
+
+
+def select_vendor(df, vendor_selection, stratify_by, source='MIXED', progress=None, pad=True, spec=None,
+                  prepared=None):
+    """
+    Run the vendor specific processing on a header mapped dataframe.
+    :param df: pandas.DataFrame, not used when prepared is given
+    :param vendor_selection: one of VENDOR_MAP
+    :param stratify_by: list of columns to stratify by
+    :param source: MIXED, LANDLINE or CELL
+    :param progress: callable receiving the name of each stage as it starts
+    :param pad: apply the vendor's normalization spec, False when it was applied while reading
+    :param spec: normalize.NormalizationSpec, normalization.json when not specified
+    :param prepared: prepared attribute of an earlier vendor instance built from the same data and source, only the
+                     batching is run again
+    :return: vendor instance or None when the vendor is not supported
+    """
+    VendorClass = VENDOR_MAP.get(vendor_selection)
+    if pad and prepared is None:
+        with span('normalization', rows_in=len(df)):
+            df = (spec or load_spec(vendor_selection)).apply(df)
+
+    if not VendorClass:
+        print("Vendor not supported or not selected.")
+        return None
+
+    rows_in = len(df) if df is not None else None
+    if vendor_selection == 'I360':
+        if source not in ('LANDLINE', 'CELL'):
+            raise ValueError("Please select a source")
+        with span('vendor init', rows_in=rows_in, vendor=vendor_selection, source=source):
+            return VendorClass(df, stratify_by, source=source, progress=progress, prepared=prepared)
+
+    with span('vendor init', rows_in=rows_in, vendor=vendor_selection, source=source):
+        return VendorClass(df, stratify_by, progress=progress, prepared=prepared)
+
+
+def save_file(vendor, save_path, project_number, source='MIXED', data_columns=None, sidecars=()):
+    """
+    Write the area codes, the I360 dupes groups and the LSAM/CSAM files for a processed vendor, concurrently, see
+    writer.write_outputs. The OUTPUT_SCHEMA columns are added to each frame as it is written.
+    :param data_columns: columns of the frame before vendor processing, see OutputSchema.materialize
+    :param sidecars: also write 'gzip' and/or 'parquet' copies of the frames
+    :return: dict of output name -> path of the csv written
+    """
+    def output(df):
+        return OUTPUT_SCHEMA.materialize(df, data_columns)
+
+    outputs = []
+    if isinstance(vendor, I360) and source == 'LANDLINE':
+        outputs.extend(Output(group, output(num)) for group, num in vendor.groups.items())
+
+    outputs.append(Output(f"{project_number}_AREACODES", vendor.get_area_codes()))
+
+    if source == 'LANDLINE':
+        outputs.append(Output(f"{project_number}LSAM", output(vendor.final_df), versioned=True))
+    elif source == 'CELL':
+        outputs.append(Output(f"{project_number}CSAM", output(vendor.final_df), versioned=True))
+    else:
+        outputs.append(Output(f"{project_number}LSAM", output(vendor.final_landline), versioned=True))
+        outputs.append(Output(f"{project_number}CSAM", output(vendor.final_cell), versioned=True))
+
+    with span('save', rows_in=sum(len(out.data) for out in outputs), files=len(outputs), sidecars=list(sidecars)):
+        return write_outputs(save_path, outputs, sidecars)
+
+
+def plot_pool():
+    global _plot_pool
+    if _plot_pool is None:
+        _plot_pool = ProcessPoolExecutor(max_workers=PLOT_WORKERS)
+    return _plot_pool
+
+
+def report_plot_error(future):
+    if future.exception() is not None:
+        error = future.exception()
+        print(''.join(traceback.format_exception(type(error), error, error.__traceback__)), error)
+
+
+def submit_plots(frames: dict, columns, save_dir, dpi=300, fmt='png', combined=False):
+    """
+    Draw the batch plots of the final frames in the background plot pool. Only the per batch value counts are sent
+    to the workers, one task per batch, or one task per source for a combined report.
+    :param frames: file name prefix -> final dataframe with BATCH numbers
+    :param columns: stratify columns to plot
+    :param save_dir: directory to save the plots
+    :return: list of futures
+    """
+    futures = []
+    options = {'save_dir': save_dir, 'dpi': dpi, 'fmt': fmt, 'combined': combined}
+    for source, frame in frames.items():
+        counts = batch_counts(frame, columns)
+        if combined:
+            futures.append(plot_pool().submit(plot_batch_counts, counts, source, **options))
+            continue
+        for batch in sorted(frame['BATCH'].unique()):
+            futures.append(plot_pool().submit(plot_batch_counts, counts, source, batches=[batch], **options))
+
+    for future in futures:
+        future.add_done_callback(report_plot_error)
+    return futures
+
+
+def project_paths(file_path):
+    """
+    Project number and output directory for a file stored in PROJECT_DIRECTORY/<project>/SAMPLE/.
+    :return: (project_number, save_path)
+    """
+    project_number = os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(file_path))))
+    save_path = f'{os.environ.get("PROJECT_DIRECTORY")}/{project_number}/SAMPLE/auto/'
+    return project_number, save_path
+
+
+class Pipeline:
+    """
+    Headless sample processing job: ingest -> header mapping -> vendor processing -> output.
+    A progress callable receives the name of every stage in stages.STAGES as it starts. It may raise
+    stages.Cancelled to stop the job at that stage boundary.
+    """
+
+    def __init__(self, vendor, file_path, join_file_path=None, source='MIXED', candidate_names=None,
+                 stratify_by=None, renames=None, save_path=None, project_number=None, df=None, progress=None,
+                 header_map=None, use_cache=True, plot=False, plot_dpi=300, plot_format='png', plot_combined=False,
+                 spec_source='json', memory_report=False, join_dump=None, sidecars=(), trace=False,
+                 exclusion_files=None, memoize=True):
+        self.vendor = vendor
+        self.file_path = file_path
+        self.join_file_path = join_file_path
+        self.source = source
+        self.candidate_names = candidate_names or []
+        self.exclusion_files = exclusion_files or []
+        self.stratify_by = stratify_by or []
+        self.renames = renames or {}
+
+        default_project_number, default_save_path = project_paths(file_path) if file_path else (None, None)
+        self.project_number = project_number or default_project_number
+        self.save_path = save_path or default_save_path
+
+        self.df = df
+        self.result = None
+        self.progress = progress
+        self.source_columns = None
+        self.header_map = header_map
+        self.padded = False
+        self.data_columns = None
+        self.spec_source = spec_source
+        self.memory_report = memory_report
+        self.join_dump = join_dump
+        self.sidecars = tuple(sidecars)
+        self.tracer = Tracer(self.project_number or '') if trace else None
+        self.memo = stage_memo() if memoize else None
+        self.memo_key = None
+        self.stored = None
+        self._spec = None
+        self._exclusion = None
+        self.cache = IngestCache(cache_dir_for(self.save_path)) if use_cache and self.save_path else None
+        self.plot_options = {'dpi': plot_dpi, 'fmt': plot_format, 'combined': plot_combined} if plot else None
+        self.plot_futures = []
+
+    @property
+    def json_filename(self):
+        return JSON_FILENAME_MAP.get(self.vendor)
+
+    @property
+    def headers(self):
+        """
+        Compiled header map of the vendor from spec_source, used to map the headers and to line up joined files.
+        """
+        return load_header_map(self.vendor, self.json_filename, self.spec_source) if self.json_filename else None
+
+    @property
+    def spec(self):
+        """
+        Normalization spec of the vendor, read from spec_source the first time it is needed.
+        """
+        if self._spec is None:
+            self._spec = load_spec(self.vendor, self.spec_source)
+        return self._spec
+
+    @property
+    def exclusion(self):
+        """
+        Candidate names and exclusion files as one exclusion.NameExclusion, built once per job.
+        """
+        if self._exclusion is None:
+            self._exclusion = NameExclusion.from_names(self.candidate_names)
+            for path in self.exclusion_files:
+                self._exclusion = self._exclusion | NameExclusion.from_file(path)
+        return self._exclusion
+
+    def report(self, stage):
+        if self.progress:
+            self.progress(stage)
+
+    def span(self, name, rows_in=None, **details):
+        """
+        Time a stage of the job when tracing, see instrument.Tracer.
+        """
+        if self.tracer is None:
+            return NULL_SPAN
+        return self.tracer.span(name, rows_in, **details)
+
+    def ingest(self):
+        self.report('ingest')
+        with self.span('ingest') as stage:
+            self.df = get_data(
+                self.file_path,
+                self.join_file_path,
+                cache=self.cache,
+                memory_report=self.memory_report,
+                headers=self.headers,
+                dump_path=self.join_dump
+            )
+            stage.rows_out = len(self.df)
+        return self.df
+
+    def sniff(self, nrows=SAMPLE_ROWS):
+        """
+        Read only the header row and the first rows of the file to drive the header mapping UI.
+        source_columns keeps the uppercased file headers that survived deletion, in column order. When files are
+        joined these are already the canonical headers, so every file maps the same way.
+        """
+        self.report('ingest')
+        with self.span('ingest'):
+            self.df = get_data(
+                self.file_path, self.join_file_path, nrows=nrows, cache=self.cache, headers=self.headers
+            )
+        self.source_columns = list(self.df.columns)
+        return self.df
+
+    def mapped_headers(self):
+        """
+        File header -> mapped header for the columns of a sniffed and mapped sample.
+        """
+        return dict(zip(self.source_columns, self.df.columns))
+
+    def load(self):
+        """
+        Read the full file once, limited to the columns in header_map, and apply the mapped names. When an earlier
+        job of this process prepared the same data, see process, the file is not read and df stays None.
+        """
+        self.report('ingest')
+        with self.span('ingest') as stage:
+            if self.memo is not None:
+                self.memo_key = self.prepare_key()
+                self.stored = self.memo.get(self.memo_key)
+                stage.set(memo_hit=self.stored is not None)
+            if self.stored is not None:
+                self.padded = True
+                self.df = None
+                return None
+            df = get_data(
+                self.file_path,
+                self.join_file_path,
+                usecols=self.header_map,
+                rename=self.header_map,
+                transforms=[self.spec],
+                cache=self.cache,
+                memory_report=self.memory_report,
+                headers=self.headers,
+                dump_path=self.join_dump
+            )
+            stage.rows_out = len(df)
+        self.padded = True
+        self.df = df
+        return self.df
+
+    def prepare_key(self):
+        """
+        Content key of the vendor processing before batching: the version of every input file, the header map, the
+        normalization spec, the deletion list, the header aliases, the excluded names, the vendor and source, and the
+        version of the WDNC list. The stratify columns are not part of it.
+        """
+        return stage_key(
+            'prepare',
+            [fingerprint(path) for path in [self.file_path] + input_files(self.join_file_path)],
+            self.header_map,
+            repr(self.spec),
+            sorted(load_deletion_headers()),
+            sorted(self.headers.aliases.items()) if self.headers else None,
+            sorted(self.exclusion.keys),
+            self.vendor,
+            self.source,
+            list_version()
+        )
+
+    def invalidate_cache(self):
+        """
+        Drop the cached frames of the input files so the next load parses them again.
+        """
+        if self.cache is None:
+            return
+        for path in [self.file_path] + input_files(self.join_file_path):
+            self.cache.invalidate(path)
+
+    def map_headers(self):
+        self.report('header mapping')
+        with self.span('header mapping', rows_in=len(self.df)) as stage:
+            if self.renames:
+                self.df = rename_columns(self.df, self.renames)
+            if self.json_filename:
+                self.df = replace_header_names(self.df, self.json_filename, self.headers)
+            else:
+                print("Vendor not supported or not selected.")
+            stage.rows_out = len(self.df)
+        return self.df
+
+    def exclude(self):
+        """
+        Remove the candidates and the people of the exclusion files, once per job right before processing.
+        """
+        with self.span('candidate exclusion', rows_in=len(self.df), names=len(self.exclusion)) as stage:
+            self.df = self.exclusion.apply(self.df)
+            stage.rows_out = len(self.df)
+        return self.df
+
+    def process(self):
+        """
+        Exclusion and vendor processing. A job loaded from the same data as an earlier one of this process, see
+        load, reuses its scrubbed and householded frames from the memo and only batches again.
+        """
+        if self.stored is None:
+            self.exclude()
+            self.data_columns = list(self.df.columns)
+            prepared = None
+        else:
+            self.data_columns, prepared = self.stored
+
+        rows_in = len(self.df) if self.df is not None else None
+        with self.span('processing', rows_in=rows_in, memo_hit=prepared is not None):
+            self.result = select_vendor(
+                self.df, self.vendor, self.stratify_by, self.source, progress=self.progress, pad=not self.padded,
+                spec=self.spec, prepared=prepared
+            )
+        # Only the prepared frames are kept, the loaded frame is released with the job
+        if prepared is None and self.memo_key is not None and hasattr(self.result, 'prepared'):
+            self.memo.put(self.memo_key, (self.data_columns, self.result.prepared))
+        return self.result
+
+    def output(self):
+        if self.result is None:
+            return
+        self.report('writing')
+        with self.span('writing'):
+            save_file(self.result, self.save_path, self.project_number, self.source, self.data_columns, self.sidecars)
+
+    def final_frames(self):
+        """
+        File name prefix -> final dataframe of the processed vendor.
+        """
+        if self.source == 'LANDLINE':
+            return {'landline_': self.result.final_df}
+        if self.source == 'CELL':
+            return {'cell_': self.result.final_df}
+        return {'landline_': self.result.final_landline, 'cell_': self.result.final_cell}
+
+    def plot_batches(self):
+        """
+        Optional last stage, started after the files are written. The plots are drawn in background processes,
+        plot_futures can be waited on.
+        """
+        if self.plot_options is None or self.result is None or not self.stratify_by:
+            return []
+        self.report('plotting')
+        # Only the submission is timed, the plots are drawn in the background
+        with self.span('plotting'):
+            self.plot_futures = submit_plots(
+                self.final_frames(), self.stratify_by, f'{self.save_path}plots', **self.plot_options
+            )
+        return self.plot_futures
+
+    def write_trace(self):
+        """
+        Save the stage timings of the job next to its output files and print them.
+        :return: path of the trace file, None when tracing is disabled
+        """
+        if self.tracer is None or not self.tracer.spans or not self.save_path:
+            return None
+        print(self.tracer.summary())
+        return self.tracer.write(self.save_path, self.project_number)
+
+    def run(self):
+        if self.header_map:
+            self.load()
+        else:
+            if self.df is None:
+                self.ingest()
+            self.map_headers()
+        self.process()
+        self.output()
+        self.plot_batches()
+        self.write_trace()
+        print("Finished processing")
+        return self.result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Process a vendor sample file without the GUI.")
+    parser.add_argument('vendor', choices=list(VENDOR_MAP))
+    parser.add_argument('file', help="vendor file (csv, txt or xlsx)")
+    parser.add_argument('--join', dest='join_files', action='append', default=[], metavar='PATH',
+                        help="file or directory of files to append to the first one, can be repeated")
+    parser.add_argument('--dump-joined', metavar='PATH', help="write the joined input to this csv for debugging")
+    parser.add_argument('--source', choices=SOURCES, default='MIXED')
+    parser.add_argument('--stratify', nargs='+', default=[], metavar='COLUMN', help="columns to stratify by")
+    parser.add_argument('--candidate', action='append', default=[], metavar='NAME',
+                        help="candidate name to exclude, can be repeated")
+    parser.add_argument('--candidates-file', help="file with one candidate name per line")
+    parser.add_argument('--exclude-file', dest='exclusion_files', action='append', default=[], metavar='PATH',
+                        help="staff, donor or prior respondent list to exclude: csv or xlsx with first and last name "
+                             "columns, or one name per line, can be repeated")
+    parser.add_argument('--rename', action='append', default=[], metavar='OLD=NEW', help="manual header rename")
+    parser.add_argument('--output-dir', help="output directory, PROJECT_DIRECTORY/<project>/SAMPLE/auto/ by default")
+    parser.add_argument('--project-number', help="project number used in output file names")
+    parser.add_argument('--no-cache', action='store_true', help="always parse the input files")
+    parser.add_argument('--plot', action='store_true', help="plot the stratify columns of every batch")
+    parser.add_argument('--plot-dpi', type=int, default=300)
+    parser.add_argument('--plot-format', default='png', help="image format of the plots, e.g. png or svg")
+    parser.add_argument('--plot-combined', action='store_true', help="one pdf report per source instead of images")
+    parser.add_argument('--invalidate-cache', action='store_true', help="drop cached frames of the input files first")
+    parser.add_argument('--spec-source', choices=['json', 'db'], default='json',
+                        help="header aliases and normalization spec from the json files, or from the database tables")
+    parser.add_argument('--sidecar', dest='sidecars', action='append', choices=SIDECARS, default=[],
+                        help="also write a gzip csv or parquet copy of every output frame, can be repeated")
+    parser.add_argument('--trace', action='store_true', help="save the time and memory of every stage as a trace file")
+    parser.add_argument('--memory-report', action='store_true', help="print the memory saved by categorical columns")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    candidate_names = list(args.candidate)
+    if args.candidates_file:
+        with open(args.candidates_file, 'r') as file:
+            candidate_names.extend(file.read().split("\n"))
+
+    renames = dict(rename.split('=', 1) for rename in args.rename)
+    save_path = os.path.join(args.output_dir, '') if args.output_dir else None
+
+    pipeline = Pipeline(
+        args.vendor,
+        args.file,
+        join_file_path=args.join_files,
+        source=args.source,
+        candidate_names=candidate_names,
+        stratify_by=[col.upper() for col in args.stratify],
+        renames=renames,
+        save_path=save_path,
+        project_number=args.project_number,
+        use_cache=not args.no_cache,
+        plot=args.plot,
+        plot_dpi=args.plot_dpi,
+        plot_format=args.plot_format,
+        plot_combined=args.plot_combined,
+        spec_source=args.spec_source,
+        memory_report=args.memory_report,
+        join_dump=args.dump_joined,
+        sidecars=args.sidecars,
+        trace=args.trace,
+        exclusion_files=args.exclusion_files,
+        # A command line job runs once, nothing would be reused from the memo
+        memoize=False
+    )
+    if args.invalidate_cache:
+        pipeline.invalidate_cache()
+    pipeline.run()
+
+    for future in pipeline.plot_futures:
+        future.exception()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    main()
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from phones import format_phones
+
+
+class OutputSchema:
+    """
+    Columns every output file carries with a constant default. The frames only hold real data while they are
+    processed, the defaults are broadcast when a frame is written. A column the vendor already filled in, such as
+    BATCH or VTYPE, keeps its values. Phone columns stored as int64 are written back as 10 digit strings.
+    """
+
+    def __init__(self, defaults: dict, phone_columns=()):
+        """
+        :param defaults: column -> constant value, in output order
+        :param phone_columns: columns holding phone numbers, formatted when they are integers
+        """
+        self.defaults = dict(defaults)
+        self.phone_columns = set(phone_columns)
+
+    def __contains__(self, column):
+        return column in self.defaults
+
+    def __iter__(self):
+        return iter(self.defaults)
+
+    def strip(self, df):
+        """
+        Drop schema columns read from the input file, their output values always come from the schema or the vendor.
+        """
+        present = [col for col in df.columns if col in self.defaults]
+        return df.drop(columns=present) if present else df
+
+    def constant(self, value, size):
+        if isinstance(value, (int, np.integer)):
+            return np.full(size, value, dtype=np.int64)
+        return np.full(size, value, dtype=object)
+
+    def materialize(self, df, data_columns=None):
+        """
+        Frame to write: the data columns, the schema columns, then the columns the vendor added.
+        Existing columns are not copied.
+        :param df: processed frame
+        :param data_columns: columns of the frame before vendor processing, the schema columns follow them. When not
+        specified the schema columns go last.
+        :return: pandas.DataFrame
+        """
+        data_columns = set(df.columns if data_columns is None else data_columns)
+        leading = [col for col in df.columns if col in data_columns and col not in self.defaults]
+        trailing = [col for col in df.columns if col not in data_columns and col not in self.defaults]
+
+        columns = {col: df[col] for col in leading}
+        for col, value in self.defaults.items():
+            columns[col] = df[col] if col in df.columns else pd.Series(self.constant(value, len(df)), index=df.index)
+        columns.update({col: df[col] for col in trailing})
+
+        for col in self.phone_columns:
+            if col in columns and pd.api.types.is_integer_dtype(columns[col].dtype):
+                columns[col] = pd.Series(format_phones(columns[col]), index=df.index)
+        return pd.DataFrame(columns, index=df.index, copy=False)
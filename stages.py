@@ -0,0 +1,24 @@
+STAGES = (
+    'ingest',
+    'header mapping',
+    'wdnc scrub',
+    'householding',
+    'batching',
+    'writing',
+    'plotting',
+)
+
+
+class Cancelled(Exception):
+    """
+    Raised at a stage boundary when the running job was cancelled.
+    """
+
+
+def stage_percent(stage):
+    """
+    Progress in percent at the start of a stage.
+    """
+    if stage not in STAGES:
+        return 0
+    return STAGES.index(stage) * 100 // len(STAGES)
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+class StratumKey:
+    """
+    Integer stratum key for a set of columns. Every column is factorized into integer codes and the codes are
+    combined into a single int64 key, so strata can be counted and compared without building a string per row.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: list):
+        self.columns = list(columns)
+        self._levels = []
+        column_codes = []
+
+        for col in self.columns:
+            codes, levels = self.factorize(df[col])
+            column_codes.append(codes.astype(np.int64))
+            self._levels.append(levels)
+
+        self._column_codes = column_codes
+        self.codes = self.combine(column_codes, [len(levels) for levels in self._levels], len(df))
+        self._first_rows = np.unique(self.codes, return_index=True)[1]
+
+    @staticmethod
+    def factorize(column: pd.Series):
+        """
+        Sorted integer codes of a column, missing values last. Categorical columns with sorted categories reuse
+        their category codes instead of hashing every value again.
+        :return: (codes, levels)
+        """
+        if isinstance(column.dtype, pd.CategoricalDtype) and column.cat.categories.is_monotonic_increasing:
+            codes = column.cat.codes.to_numpy().astype(np.int64)
+            levels = pd.Index(column.cat.categories.to_numpy(dtype=object), dtype=object)
+            if (codes < 0).any():
+                codes[codes < 0] = len(levels)
+                levels = levels.append(pd.Index([np.nan], dtype=object))
+            return codes, levels
+        return pd.factorize(column, sort=True, use_na_sentinel=False)
+
+    @staticmethod
+    def combine(column_codes: list, cardinalities: list, size: int) -> np.ndarray:
+        """
+        Combine per column codes into dense stratum codes numbered 0 to k - 1.
+        Mixed radix encoding is used while the key space fits in an int64, otherwise rows are grouped by their codes.
+        :param column_codes: list of integer code arrays, one per column
+        :param cardinalities: amount of distinct values in each column
+        :param size: amount of rows
+        :return: numpy array of stratum codes
+        """
+
+        if not column_codes:
+            return np.zeros(size, dtype=np.int64)
+
+        if np.prod([max(c, 1) for c in cardinalities], dtype=float) < np.iinfo(np.int64).max:
+            key = np.zeros(size, dtype=np.int64)
+            for codes, cardinality in zip(column_codes, cardinalities):
+                key = key * max(cardinality, 1) + codes
+            return pd.factorize(key, sort=True)[0].astype(np.int64)
+
+        frame = pd.DataFrame({i: codes for i, codes in enumerate(column_codes)})
+        return frame.groupby(list(frame.columns), sort=True).ngroup().to_numpy(dtype=np.int64)
+
+    @property
+    def n_strata(self) -> int:
+        return len(self._first_rows)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """
+        Amount of rows in each stratum, indexed by stratum code.
+        """
+        return np.bincount(self.codes, minlength=self.n_strata)
+
+    def low_count_mask(self, n: int) -> np.ndarray:
+        """
+        Row mask of the strata that have fewer than n rows.
+        :param n: minimum amount of rows for a stratum
+        :return: boolean numpy array aligned with the rows of the dataframe
+        """
+        return (self.counts < n)[self.codes]
+
+    def labels(self) -> pd.DataFrame:
+        """
+        Reverse mapping from stratum code to the readable column values.
+        :return: dataframe indexed by stratum code with one column per stratify column
+        """
+        return pd.DataFrame(
+            {
+                col: levels.take(codes[self._first_rows])
+                for col, levels, codes in zip(self.columns, self._levels, self._column_codes)
+            },
+            index=pd.RangeIndex(self.n_strata, name='STRATUM')
+        )
+
+    def label_strings(self, sep: str = '-') -> pd.Index:
+        """
+        Stratum labels joined into a single string per stratum, matching the old '-'.join keys.
+        :param sep: separator between the column values
+        :return: index of labels ordered by stratum code
+        """
+        if self.n_strata == 0:
+            return pd.Index([], dtype=object)
+        if not self.columns:
+            return pd.Index([''] * self.n_strata)
+        labels = self.labels()
+        joined = labels[self.columns[0]].map(str)
+        for col in self.columns[1:]:
+            joined = joined + sep + labels[col].map(str)
+        return pd.Index(joined)
+
+    def value_counts(self) -> pd.Series:
+        """
+        Per stratum row counts indexed by the readable stratum label, for reports.
+        """
+        return pd.Series(self.counts, index=self.label_strings(), name='count').sort_values(ascending=False)
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def wdnc_list(tmp_path, monkeypatch):
+    """
+    Write a WDNC list in tmp_path and point WDNC_PATH at it.
+    :return: callable writing the given numbers as the list, returns the list path
+    """
+    path = tmp_path / 'wdnc.txt'
+    monkeypatch.setenv('WDNC_PATH', str(path))
+    monkeypatch.delenv('WDNC_INDEX_PATH', raising=False)
+    writes = []
+
+    def write(numbers):
+        path.write_text(''.join(f"{number}\n" for number in numbers))
+        # Distinct mtimes even when the list is rewritten within the clock resolution
+        writes.append(None)
+        os.utime(path, ns=(len(writes) * 10 ** 9, len(writes) * 10 ** 9))
+        return str(path)
+
+    return write
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from cache import IngestCache  # noqa: E402
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'vendor.csv'
+    path.write_text('PHONE,NAME\n5125550100,A\n,\n')
+    return str(path)
+
+
+def test_round_trip_keeps_missing_values_as_nan(tmp_path, source):
+    cache = IngestCache(str(tmp_path / 'cache'))
+    df = pd.read_csv(source, dtype=str)
+    cache.put(source, df)
+
+    cached = cache.get(source)
+    assert isinstance(cached['PHONE'].iloc[1], float) and np.isnan(cached['PHONE'].iloc[1])
+    pd.testing.assert_frame_equal(cached, df)
+    assert cache.get(source, columns=['NAME'], nrows=1).to_dict('list') == {'NAME': ['A']}
+
+
+def test_modified_file_misses(tmp_path, source):
+    cache = IngestCache(str(tmp_path / 'cache'))
+    cache.put(source, pd.read_csv(source, dtype=str))
+    os.utime(source, ns=(0, 0))
+    assert cache.get(source) is None
+
+
+def test_evict_skips_entries_removed_by_another_process(tmp_path, source, monkeypatch):
+    cache = IngestCache(str(tmp_path / 'cache'), max_bytes=0)
+    cache.put(source, pd.read_csv(source, dtype=str))
+    gone = str(tmp_path / 'cache' / 'gone.parquet')
+    entries = cache.entries()
+    monkeypatch.setattr(cache, 'entries', lambda: entries + [gone])
+
+    cache.evict()
+    assert not any(os.path.exists(path) for path in entries)
+    cache.invalidate(source)
+    cache.clear()
+
+
+def test_get_after_concurrent_eviction_misses(tmp_path, source, monkeypatch):
+    cache = IngestCache(str(tmp_path / 'cache'))
+    cache.put(source, pd.read_csv(source, dtype=str))
+    # The entry exists when checked and is gone when read
+    monkeypatch.setattr(os.path, 'exists', lambda path: True)
+    cache.clear()
+    assert cache.get(source) is None
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from exclusion import NameExclusion, name_keys
+
+
+def people():
+    return pd.DataFrame({
+        'FNAME': ['JAMES', 'MARY', 'MARY ANN', 'JOHN', None, 'JAMES'],
+        'LNAME': ['SMITH', 'ANN SMITH', 'SMITH', 'DOE', 'SMITH', 'DOE'],
+        'PHONE': range(6),
+    })
+
+
+def test_name_keys():
+    assert name_keys(' mary ann smith ') == [('MARY', 'ANN SMITH'), ('MARY ANN', 'SMITH')]
+    assert name_keys('CHER') == []
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+def test_apply_matches_every_split(categorical):
+    df = people()
+    if categorical:
+        df[['FNAME', 'LNAME']] = df[['FNAME', 'LNAME']].astype('category')
+    result = NameExclusion.from_names(['James Smith', 'MARY ANN SMITH', '', 'NOBODY HERE']).apply(df)
+    assert result['PHONE'].tolist() == [3, 4, 5]
+
+
+def test_apply_matches_a_naive_join():
+    df = people()
+    names = ['JOHN DOE', 'JAMES DOE', 'MARY SMITH']
+    expected = ~(df['FNAME'] + ' ' + df['LNAME']).isin(names)
+    assert NameExclusion.from_names(names).apply(df)['PHONE'].tolist() == df[expected]['PHONE'].tolist()
+
+
+def test_nothing_to_exclude_returns_the_same_frame():
+    df = people()
+    assert NameExclusion.from_names(['NOBODY HERE']).apply(df) is df
+    assert NameExclusion().apply(df) is df
+
+
+def test_missing_name_columns_are_skipped(capsys):
+    df = people().drop(columns='LNAME')
+    assert NameExclusion.from_names(['JAMES SMITH']).apply(df) is df
+    assert 'LNAME' in capsys.readouterr().out
+
+
+def test_union():
+    exclusion = NameExclusion.from_names(['JAMES SMITH']) | NameExclusion.from_names(['JOHN DOE'])
+    assert exclusion.keys == {('JAMES', 'SMITH'), ('JOHN', 'DOE')}
+
+
+def test_from_file_name_columns(tmp_path):
+    path = tmp_path / 'staff.csv'
+    path.write_text('First Name,Last Name,Office\n james ,smith,A\n,DOE,B\n')
+    assert NameExclusion.from_file(str(path)).keys == {('JAMES', 'SMITH')}
+
+
+def test_from_file_single_column(tmp_path):
+    path = tmp_path / 'staff.csv'
+    path.write_text('JAMES SMITH\nJOHN DOE\n')
+    assert NameExclusion.from_file(str(path)).keys == {('JAMES', 'SMITH'), ('JOHN', 'DOE')}
+
+
+def test_from_file_one_name_per_line(tmp_path):
+    path = tmp_path / 'staff.txt'
+    path.write_text('James Smith\n\nMary Ann Smith\n')
+    assert len(NameExclusion.from_file(str(path))) == 3
+
+
+@pytest.mark.parametrize('name, text', [
+    ('staff.csv', 'FIRST,LAST\nJAMES,SMITH\n'),
+    ('staff.csv', 'JAMES,SMITH\nJOHN,DOE\n'),
+    ('staff.txt', 'JAMES,SMITH\n'),
+    ('staff.txt', 'JAMES\tSMITH\n'),
+])
+def test_from_file_unrecognised_columns_raise(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    with pytest.raises(ValueError):
+        NameExclusion.from_file(str(path))
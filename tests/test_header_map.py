@@ -0,0 +1,44 @@
+import pytest
+
+import models
+from header_map import header_map_from_db, load_header_map
+from models import Base, Vendors, Headers, DerivedHeaders, get_engine, get_session
+from pipeline import Pipeline
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """
+    In-memory database holding Tarrance with a TELEPHONE alias of PHONE, used as the process wide engine.
+    """
+    monkeypatch.setattr(models, '_specs', {})
+    engine = get_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with get_session() as session:
+        session.add_all([
+            Vendors(vendor_id=1, vendor_name='Tarrance'),
+            Headers(header_id=1, header_name='PHONE'),
+            DerivedHeaders(derived_id=1, header_id=1, derived_header='TELEPHONE'),
+        ])
+        session.commit()
+    yield engine
+    engine.dispose()
+    monkeypatch.setattr(models, '_engine', None)
+
+
+def test_header_map_from_db_is_compiled_once_per_spec(database, monkeypatch):
+    header_map = header_map_from_db('Tarrance')
+    assert header_map.aliases == {'TELEPHONE': 'PHONE'}
+    assert header_map_from_db('Tarrance') is header_map
+
+    # Once the spec cache expires the spec is fetched and compiled again
+    monkeypatch.setattr(models, 'SPEC_CACHE_TTL', 0)
+    assert header_map_from_db('Tarrance') is not header_map
+
+
+def test_pipeline_maps_headers_from_spec_source(database):
+    assert load_header_map('Tarrance', 'tarrance_replacement.json', 'db').aliases == {'TELEPHONE': 'PHONE'}
+
+    job = Pipeline('Tarrance', None, spec_source='db', use_cache=False)
+    assert job.headers is header_map_from_db('Tarrance')
+    assert Pipeline('Tarrance', None).headers is not job.headers
@@ -0,0 +1,17 @@
+from ingest import read_file
+from instrument import Tracer
+
+
+def test_read_file_records_the_file_type(tmp_path, capsys):
+    path = tmp_path / 'sample.csv'
+    path.write_text("PHONE,CD\n5125550100,1\n5125550101,2\n")
+
+    tracer = Tracer()
+    with tracer.span('ingest'):
+        df = read_file(str(path), usecols=['PHONE', 'CD'])
+        read_file(str(path), nrows=0)
+
+    assert df['PHONE'].tolist() == ['5125550100', '5125550101']
+    deletes = [span for span in tracer.spans if span.name == 'delete columns']
+    assert [span.details['file_type'] for span in deletes] == ['csv', 'csv']
+    assert capsys.readouterr().out == ''
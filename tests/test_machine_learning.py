@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from machine_learning import assign_batches, stratified_split
+
+
+def frame(size=1003, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'ID': np.arange(size),
+        'CD': rng.choice(['01', '02', '03'], size, p=[0.6, 0.3, 0.1]),
+        'PRTY': rng.choice([1, 2, 3, 4], size),
+    })
+
+
+@pytest.mark.parametrize('n', [1, 7, 20])
+def test_stratified_split_is_balanced(n):
+    df = frame()
+    batches = stratified_split(df, ['CD', 'PRTY'], n, random_state=1)
+    assert len(batches) == n
+
+    # Every row lands in exactly one batch
+    assert sorted(pd.concat(batches)['ID']) == df['ID'].tolist()
+
+    sizes = [len(batch) for batch in batches]
+    assert max(sizes) - min(sizes) <= 1
+
+    # Every stratum is spread over the batches as evenly as its size allows
+    counts = pd.concat(batches, keys=range(n)).reset_index(level=0).groupby(['CD', 'PRTY', 'level_0']).size()
+    counts = counts.unstack(fill_value=0).reindex(columns=range(n), fill_value=0)
+    assert ((counts.max(axis=1) - counts.min(axis=1)) <= 1).all()
+
+
+def test_stratified_split_is_reproducible():
+    df = frame()
+    first = stratified_split(df, ['CD'], 5, random_state=3)
+    second = stratified_split(df, ['CD'], 5, random_state=3)
+    assert all(a['ID'].tolist() == b['ID'].tolist() for a, b in zip(first, second))
+
+
+def test_more_batches_than_rows():
+    df = frame(size=3)
+    batches = stratified_split(df, ['CD'], 5, random_state=0)
+    assert [len(batch) for batch in batches].count(0) == 2
+    assert len(assign_batches(df.iloc[:0], ['CD'])) == 0
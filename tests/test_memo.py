@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from memo import stage_memo
+from pipeline import Pipeline
+
+HEADER_MAP = {'PHONE': 'PHONE', 'CELL': 'CELL', 'REGION': 'REGN', 'GENDER': 'GEND', 'FNAME': 'FNAME', 'LNAME': 'LNAME'}
+
+
+@pytest.fixture
+def tarrance_file(tmp_path):
+    rows = [
+        {'PHONE': f"51255501{i:02d}", 'CELL': 'Y' if i % 2 else 'N', 'REGION': str(i % 3 + 1),
+         'GENDER': 'MF'[i % 2], 'FNAME': f"NAME{i}", 'LNAME': 'SMITH'}
+        for i in range(40)
+    ]
+    path = tmp_path / 'SAMPLE' / 'tarrance.csv'
+    path.parent.mkdir()
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def empty_memo():
+    stage_memo().clear()
+    yield
+    stage_memo().clear()
+
+
+def run(path, stratify_by, tmp_path):
+    job = Pipeline('Tarrance', path, stratify_by=stratify_by, header_map=HEADER_MAP, save_path=f"{tmp_path}/out/",
+                   project_number='T', use_cache=False, trace=True)
+    job.load()
+    job.process()
+    return job
+
+
+def phones(job):
+    return set(job.result.final_landline['PHONE']) | set(job.result.final_cell['PHONE'])
+
+
+def test_restratify_reuses_prepared_frames(tarrance_file, tmp_path, wdnc_list):
+    wdnc_list([5125550100])
+    first = run(tarrance_file, ['REGN'], tmp_path)
+    second = run(tarrance_file, ['GEND'], tmp_path)
+
+    assert 'read' in [span.name for span in first.tracer.spans]
+    assert 'read' not in [span.name for span in second.tracer.spans]
+    assert phones(first) == phones(second)
+    assert 5125550100 not in phones(second)
+
+
+def test_swapped_wdnc_list_is_scrubbed_again(tarrance_file, tmp_path, wdnc_list):
+    wdnc_list([5125550100])
+    first = run(tarrance_file, ['REGN'], tmp_path)
+    assert 5125550100 not in phones(first)
+    assert 5125550102 in phones(first)
+
+    wdnc_list([5125550102])
+    second = run(tarrance_file, ['REGN'], tmp_path)
+    assert 'read' in [span.name for span in second.tracer.spans]
+    assert 5125550100 in phones(second)
+    assert 5125550102 not in phones(second)
+
+
+def test_prepared_branches_are_batched_again_in_workers(tarrance_file, wdnc_list):
+    from pipeline import get_data, replace_header_names
+    from normalize import load_spec
+    from vendor import Tarrance
+
+    wdnc_list([5125550100])
+    df = load_spec('Tarrance').apply(replace_header_names(get_data(tarrance_file), 'tarrance_replacement.json'))
+    first = Tarrance(df, ['REGN'], parallel=True)
+    second = Tarrance(None, ['GEND'], parallel=True, prepared=first.prepared)
+
+    for branch in ('final_landline', 'final_cell'):
+        before, after = getattr(first, branch), getattr(second, branch)
+        assert sorted(before['PHONE']) == sorted(after['PHONE'])
+        assert list(before.columns) == list(after.columns)
+        assert after['BATCH'].between(1, 20).all()
+    assert 5125550100 not in set(second.final_landline['PHONE'])
+    assert second.get_area_codes().equals(first.get_area_codes())
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from models import (
+    Base, Vendors, Headers, DerivedHeaders, VendorDerivedHeaderMapping, VendorHeaderPadding, fetch_vendor_spec
+)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            Vendors(vendor_id=1, vendor_name='Tarrance'),
+            Vendors(vendor_id=2, vendor_name='I360'),
+            Headers(header_id=1, header_name='PHONE'),
+            Headers(header_id=2, header_name='CELL'),
+            Headers(header_id=3, header_name='CD'),
+            DerivedHeaders(derived_id=1, header_id=1, derived_header='TELEPHONE'),
+            DerivedHeaders(derived_id=2, header_id=1, derived_header='MOBILE'),
+            DerivedHeaders(derived_id=3, header_id=3, derived_header='CONGRESSIONAL DISTRICT'),
+            VendorDerivedHeaderMapping(vendor_id=2, derived_id=2, mapped_header_id=2),
+            VendorHeaderPadding(vendor_id=1, header_id=3, padding_spec=2),
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def test_fetch_vendor_spec(session):
+    spec = fetch_vendor_spec('Tarrance', session)
+    assert spec.replacements == {'PHONE': ['TELEPHONE', 'MOBILE'], 'CD': ['CONGRESSIONAL DISTRICT']}
+    assert spec.padding == {'CD': 2}
+
+
+def test_fetch_vendor_spec_applies_vendor_mappings(session):
+    spec = fetch_vendor_spec('I360', session)
+    assert spec.replacements == {'PHONE': ['TELEPHONE'], 'CELL': ['MOBILE'], 'CD': ['CONGRESSIONAL DISTRICT']}
+    assert spec.padding == {}
+
+
+def test_fetch_vendor_spec_rejects_unknown_vendors(session):
+    with pytest.raises(ValueError, match='Unknown vendor'):
+        fetch_vendor_spec('Nobody', session)
+
+
+def test_fetch_vendor_spec_without_headers():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Vendors(vendor_id=1, vendor_name='Tarrance'))
+        session.commit()
+        assert fetch_vendor_spec('Tarrance', session).replacements == {}
+        with pytest.raises(ValueError, match='Unknown vendor'):
+            fetch_vendor_spec('Nobody', session)
+    engine.dispose()
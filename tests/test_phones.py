@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from normalize import NormalizationSpec, ColumnSpec
+from phones import MISSING, InvalidPhoneWarning, format_phones, parse_phones, phone_column
+
+
+@pytest.mark.parametrize('value', [
+    '5125550100', ' 5125550100 ', '(512) 555-0100', '512.555.0100', '1-512-555-0100', '15125550100',
+    '+1 512 555 0100', '512-555-0100 x12', '(512) 555-0100 ext. 4', '512 555 0100 Extension 100',
+])
+def test_parse_phones_formats(value):
+    numbers, valid = parse_phones(pd.Series([value]))
+    assert numbers.tolist() == [5125550100]
+    assert valid.tolist() == [True]
+
+
+@pytest.mark.parametrize('value', ['', '   ', None, np.nan, 'N/A', '12345', '25125550100', '512555010012'])
+def test_parse_phones_rejects(value):
+    numbers, valid = parse_phones(pd.Series([value], dtype=object))
+    assert numbers.tolist() == [MISSING]
+    assert valid.tolist() == [False]
+
+
+def test_parse_phones_integers():
+    numbers, valid = parse_phones(pd.Series([5125550100, 15125550100, 0, 123], dtype=np.int64))
+    assert numbers.tolist() == [5125550100, 5125550100, MISSING, MISSING]
+    assert valid.tolist() == [True, True, False, False]
+
+
+def test_phone_column_keeps_rejected_values():
+    column = pd.Series(['5125550100', 'CALL OFFICE', '', None, '12345'], name='PHONE')
+    with pytest.warns(InvalidPhoneWarning, match='2 PHONE values'):
+        numbers, invalid = phone_column(column)
+    assert numbers.tolist() == [5125550100, MISSING, MISSING, MISSING, MISSING]
+    assert invalid.name == 'PHONE_INVALID'
+    assert invalid.isna().tolist() == [True, False, True, True, False]
+    assert invalid.dropna().tolist() == ['CALL OFFICE', '12345']
+
+
+def test_phone_column_categorical():
+    column = pd.Series(['5125550100', 'CALL OFFICE', '5125550100', None], name='CELL', dtype='category')
+    with pytest.warns(InvalidPhoneWarning):
+        numbers, invalid = phone_column(column)
+    assert numbers.tolist() == [5125550100, MISSING, 5125550100, MISSING]
+    assert invalid.dropna().tolist() == ['CALL OFFICE']
+
+
+def test_phone_column_all_valid():
+    numbers, invalid = phone_column(pd.Series(['5125550100', ''], name='PHONE'))
+    assert invalid is None
+    assert format_phones(numbers).tolist() == ['5125550100', '']
+
+
+def test_spec_adds_invalid_column():
+    df = pd.DataFrame({'PHONE': ['5125550100', 'bad'], 'REGN': ['1', '2']})
+    with pytest.warns(InvalidPhoneWarning):
+        df = NormalizationSpec({'PHONE': ColumnSpec(phone=True), 'REGN': ColumnSpec(width=2)}).apply(df)
+    assert list(df.columns) == ['PHONE', 'REGN', 'PHONE_INVALID']
+    assert df['PHONE'].tolist() == [5125550100, MISSING]
+    assert df['PHONE_INVALID'].tolist()[1] == 'bad'
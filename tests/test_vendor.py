@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from normalize import load_spec
+from vendor import I360
+
+
+def i360_frame(phones, cells):
+    size = len(phones)
+    df = pd.DataFrame({
+        'PHONE': phones, 'CELL': cells, 'RDATE': ['2001-01-31'] * size, 'DOBY': ['1980'] * size,
+        'PARTY': ['R'] * size, 'FNAME': [f"NAME{i}" for i in range(size)], 'LNAME': ['SMITH'] * size,
+        'GEND': ['M'] * size,
+    })
+    return load_spec('I360').apply(df)
+
+
+def test_source_codes(wdnc_list):
+    wdnc_list([])
+    phones = ['5125550100', np.nan, '5125550102', np.nan, '  ']
+    cells = ['5125550200', '5125550201', np.nan, np.nan, '5125550202']
+    result = I360.__new__(I360)
+    result.source = 'CELL'
+    df = result.initialize_df(i360_frame(phones, cells)).sort_values('FNAME')
+    # Landline and cell, cell only, landline only, no SOURCE without any phone, and a blank landline is missing
+    assert df['SOURCE'].fillna(0).tolist() == [3.0, 2.0, 1.0, 0.0, 2.0]
+    assert df['SOURCE'].dtype == np.float64
+
+
+def test_household():
+    result = I360.__new__(I360)
+    # Sorted by age as initialize_df leaves it, so the first row of every phone is its youngest member
+    result.df = pd.DataFrame({
+        'PHONE': np.array([5125550100, 5125550101, 5125550100, 0, 5125550102, 5125550100, 5125550102, 0],
+                          dtype=np.int64),
+        'FNAME': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H'],
+        'LNAME': ['SMITH'] * 8,
+        'GEND': ['F', 'M', 'M', 'F', 'F', 'M', 'M', 'F'],
+        'PRTY': [1, 2, 1, 3, 4, 1, 2, 3],
+        'IAGE': [20, 25, 30, 35, 40, 45, 50, 55],
+    })
+    result.household()
+    df = result.df.set_index('FNAME')
+
+    # One row per phone, rows without a phone are not householded but deduplicated like one phone, as NaN was before
+    assert df.index.tolist() == ['A', 'B', 'D', 'E']
+    assert df.loc['A', ['FNME2', 'IAGE2', 'FNME3', 'PRTY3', 'FNME4']].tolist() == ['C', 30, 'F', 1, '']
+    assert df.loc['E', ['FNME2', 'GEND2', 'FNME3']].tolist() == ['G', 'M', '']
+    assert (df.loc[['B', 'D'], ['FNME2', 'FNME3', 'FNME4']] == '').all().all()
+
+    groups = result._groups
+    assert groups['2 dupes']['FNAME'].tolist() == ['G']
+    assert groups['3 dupes']['FNAME'].tolist() == ['C', 'F']
+    assert groups['4 dupes'].empty
@@ -0,0 +1,45 @@
+import os
+import stat
+
+import numpy as np
+import pandas as pd
+
+import wdnc
+
+
+def test_build_index(tmp_path, wdnc_list):
+    source = wdnc_list([5125550103, 2145550100, 5125550103, 'nonsense'])
+    destination = wdnc.build_index(source)
+    assert np.fromfile(destination, dtype=np.uint64).tolist() == [2145550100, 5125550103]
+    assert stat.S_IMODE(os.stat(destination).st_mode) == wdnc.INDEX_MODE
+    assert sorted(os.listdir(tmp_path)) == ['wdnc.txt', 'wdnc.txt.idx', 'wdnc.txt.idx.json']
+
+
+def test_in_wdnc():
+    index = np.array([2145550100, 5125550103, 9995550100], dtype=np.uint64)
+    phones = ['5125550103', '5125550104', np.nan, 'nonsense', '-5125550103', '9995550100', '9995550101', '1']
+    assert wdnc.in_wdnc(phones, index).tolist() == [True, False, False, False, False, True, False, False]
+
+
+def test_in_wdnc_with_parsed_phones():
+    index = np.array([2145550100, 5125550103], dtype=np.uint64)
+    # Parsed phones use 0 for a missing number, which is never on the list
+    phones = pd.Series([5125550103, 0, 2145550101, 2145550100], dtype=np.int64)
+    assert wdnc.in_wdnc(phones, index).tolist() == [True, False, False, True]
+    assert wdnc.in_wdnc(phones, np.empty(0, dtype=np.uint64)).tolist() == [False] * 4
+
+
+def test_in_wdnc_loads_the_current_list(wdnc_list):
+    wdnc_list([5125550103])
+    assert wdnc.in_wdnc(['5125550103', '5125550104']).tolist() == [True, False]
+    wdnc_list([5125550104])
+    assert wdnc.in_wdnc(['5125550103', '5125550104']).tolist() == [False, True]
+
+
+def test_empty_list(wdnc_list):
+    for numbers in ([], ['', '  ']):
+        source = wdnc_list(numbers)
+        destination = wdnc.build_index(source)
+        assert os.path.getsize(destination) == 0
+        assert len(wdnc.load_index(source)) == 0
+        assert wdnc.in_wdnc(['5125550103']).tolist() == [False]
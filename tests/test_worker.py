@@ -0,0 +1,185 @@
+import threading
+import time
+
+import pytest
+import PyQt5.QtCore as qtc
+
+from stages import STAGES, stage_percent
+from worker import Worker, JobQueue
+
+
+@pytest.fixture(scope='module')
+def app():
+    return qtc.QCoreApplication.instance() or qtc.QCoreApplication([])
+
+
+def wait_until(condition, timeout=5):
+    """
+    Process queued signals until condition() holds.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        qtc.QCoreApplication.processEvents()
+        time.sleep(0.001)
+
+
+def record(worker):
+    """
+    Collect every signal the worker emits, in order.
+    """
+    events = []
+    worker.progress.connect(lambda stage, percent: events.append(('progress', stage, percent)))
+    worker.result.connect(lambda result: events.append(('result', result)))
+    worker.error.connect(lambda message: events.append(('error', message)))
+    worker.cancelled.connect(lambda: events.append(('cancelled',)))
+    return events
+
+
+def finished(events):
+    return lambda: events and events[-1][0] in ('result', 'error', 'cancelled')
+
+
+def test_stage_percent():
+    percents = [stage_percent(stage) for stage in STAGES]
+    assert percents[0] == 0
+    assert percents == sorted(set(percents))
+    assert percents[-1] < 100
+    assert stage_percent('unknown') == 0
+
+
+def test_progress_and_result(app):
+    def task(report):
+        report('ingest')
+        report('batching')
+        return 'done'
+
+    worker = Worker(task, 'job')
+    events = record(worker)
+    worker.start()
+    wait_until(finished(events))
+    worker.wait()
+
+    assert events == [
+        ('progress', 'ingest', stage_percent('ingest')),
+        ('progress', 'batching', stage_percent('batching')),
+        ('result', 'done'),
+    ]
+
+
+def test_error(app):
+    def task(report):
+        report('ingest')
+        raise ValueError("bad file")
+
+    worker = Worker(task)
+    events = record(worker)
+    worker.start()
+    wait_until(finished(events))
+    worker.wait()
+
+    assert [event[0] for event in events] == ['progress', 'error']
+    assert 'ValueError' in events[-1][1] and 'bad file' in events[-1][1]
+
+
+def test_cancel_stops_at_the_next_stage(app):
+    started = threading.Event()
+    resume = threading.Event()
+    stages = []
+
+    def task(report):
+        report('ingest')
+        stages.append('ingest')
+        started.set()
+        resume.wait(5)
+        report('batching')
+        stages.append('batching')
+        return 'done'
+
+    worker = Worker(task)
+    events = record(worker)
+    worker.start()
+    assert started.wait(5)
+    worker.cancel()
+    resume.set()
+    wait_until(finished(events))
+    worker.wait()
+
+    assert stages == ['ingest']
+    assert events == [('progress', 'ingest', stage_percent('ingest')), ('cancelled',)]
+
+
+def test_cancel_after_the_last_stage_drops_the_result(app):
+    def task(report):
+        report('writing')
+        worker.cancel()
+        return 'done'
+
+    worker = Worker(task)
+    events = record(worker)
+    worker.start()
+    wait_until(finished(events))
+    worker.wait()
+
+    assert events[-1] == ('cancelled',)
+
+
+def test_queue_runs_jobs_one_at_a_time(app):
+    lock = threading.Lock()
+    running = []
+    overlap = []
+    order = []
+
+    def job(name):
+        def task(report):
+            with lock:
+                running.append(name)
+                overlap.append(len(running))
+            report('ingest')
+            time.sleep(0.02)
+            with lock:
+                running.remove(name)
+                order.append(name)
+            return name
+        return task
+
+    queue = JobQueue()
+    pending = []
+    queue.changed.connect(pending.append)
+    results = []
+    for name in ('first', 'second', 'third'):
+        worker = Worker(job(name), name)
+        worker.result.connect(results.append)
+        queue.enqueue(worker)
+
+    wait_until(lambda: queue.current is None)
+
+    assert order == ['first', 'second', 'third']
+    assert results == order
+    assert overlap == [1, 1, 1]
+    assert pending[-1] == 0
+
+
+def test_queue_clear_and_cancel(app):
+    release = threading.Event()
+    ran = []
+
+    def task(report):
+        ran.append(report)
+        release.wait(5)
+        report('writing')
+
+    queue = JobQueue()
+    first, second = Worker(task), Worker(task)
+    events = record(first)
+    queue.enqueue(first)
+    queue.enqueue(second)
+
+    queue.clear()
+    queue.cancel_current()
+    release.set()
+    wait_until(lambda: queue.current is None)
+
+    # The queued job never starts and the running one stops at its next stage
+    assert len(ran) == 1
+    assert events[-1] == ('cancelled',)
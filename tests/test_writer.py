@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import writer
+from writer import Output, allocate_versions, write_csv, write_outputs
+
+
+def frame():
+    return pd.DataFrame({
+        'PHONE': np.array([5125550100, 5125550101, 5125550102], dtype=np.int64),
+        'NAME': ['A', None, 'C'],
+        'GEND': pd.Categorical(['M', 'F', None]),
+        'IAGE': [30.0, np.nan, 99.0],
+        'BATCH': [1, 2, 3],
+    })
+
+
+@pytest.mark.parametrize('df', [frame(), frame().assign(NAME=['A, JR', 'B "BO"', 'C\nD'])])
+def test_write_csv_matches_pandas(tmp_path, df):
+    path = write_csv(df, str(tmp_path / 'out.csv'))
+    df.to_csv(tmp_path / 'expected.csv', index=False)
+    assert open(path).read() == open(tmp_path / 'expected.csv').read()
+
+
+def test_write_outputs(tmp_path):
+    series = pd.Series([3, 1], index=pd.Index(['512', '214'], name='PHONE'), name='count')
+    paths = write_outputs(str(tmp_path), [
+        Output('P1LSAM', frame(), versioned=True), Output('P1_AREACODES', series)
+    ], sidecars=('gzip', 'parquet'))
+
+    assert paths == {'P1LSAM': str(tmp_path / 'P1LSAM.csv'), 'P1_AREACODES': str(tmp_path / 'P1_AREACODES.csv')}
+    # Series are only written as csv
+    assert sorted(os.listdir(tmp_path)) == ['P1LSAM.csv', 'P1LSAM.csv.gz', 'P1LSAM.parquet', 'P1_AREACODES.csv']
+    pd.testing.assert_frame_equal(pd.read_csv(paths['P1LSAM']), pd.read_csv(paths['P1LSAM'] + '.gz'))
+    assert pd.read_csv(paths['P1_AREACODES']).to_dict('list') == {'PHONE': [512, 214], 'count': [3, 1]}
+
+    again = write_outputs(str(tmp_path), [Output('P1LSAM', frame(), versioned=True)])
+    assert again == {'P1LSAM': str(tmp_path / 'P1LSAM1.csv')}
+
+
+def test_concurrent_jobs_get_distinct_versions(tmp_path):
+    def job(_):
+        return write_outputs(str(tmp_path), [Output('P1LSAM', frame(), versioned=True)])['P1LSAM']
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        paths = list(pool.map(job, range(16)))
+    assert len(set(paths)) == 16
+    assert all(pd.read_csv(path)['BATCH'].tolist() == [1, 2, 3] for path in paths)
+
+
+def test_allocate_versions_reserves_names(tmp_path):
+    first = allocate_versions(str(tmp_path), ['P1LSAM', 'P1CSAM'])
+    second = allocate_versions(str(tmp_path), ['P1LSAM'])
+    assert first == {'P1LSAM': 'P1LSAM.csv', 'P1CSAM': 'P1CSAM.csv'}
+    assert second == {'P1LSAM': 'P1LSAM1.csv'}
+
+
+def test_failed_write_releases_its_name(tmp_path, monkeypatch):
+    def write_output(path, data, sidecars=()):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(writer, 'write_output', write_output)
+    with pytest.raises(OSError):
+        write_outputs(str(tmp_path), [Output('P1LSAM', frame(), versioned=True)])
+    assert os.listdir(tmp_path) == []
@@ -1,41 +1,124 @@
+import os
 import traceback
 import pandas as pd
+import numpy as np
 
-from machine_learning import stratified_split, plot_batches
-from wdnc import wdnc
-from datetime import date
-
-
-class Tarrance:
+from concurrent.futures import ProcessPoolExecutor
 
-    def __init__(self, df: pd.DataFrame, stratify_by: list):
-        self.data = df
+from instrument import span
+from machine_learning import stratified_split
+from normalize import ColumnSpec
+from phones import area_code_counts, has_phone
+from stages import Cancelled
+from wdnc import in_wdnc
+from datetime import date
 
+# Mixed files smaller than this are batched in process, where starting worker processes would cost more than it saves
+PARALLEL_MIN_ROWS = 200_000
+
+
+def number_batches(batches):
+    for i, batch in enumerate(batches):
+        batch['BATCH'] = i + 1
+    return pd.concat(batches).reset_index(drop=True)
+
+
+def batch_branch(vendor_class, branch, df, stratify_by, prepared=False):
+    """
+    Build one branch of a mixed vendor file through its property setter (type filter, WDNC scrub, VTYPE/MD) and
+    number its stratified batches. Module level so it can run in a worker process.
+    :param vendor_class: Tarrance or Baselice
+    :param branch: 'landline_df' or 'cell_df'
+    :param df: rows of the branch type
+    :param stratify_by: list of columns to stratify by
+    :param prepared: df is a final branch of an earlier run, only batched again
+    :return: pandas.DataFrame with BATCH numbers
+    """
+    if not prepared:
+        vendor = vendor_class.__new__(vendor_class)
+        setattr(vendor, branch, df)
+        df = getattr(vendor, branch)
+    return number_batches(stratified_split(df, stratify_by))
+
+
+def build_branches(vendor_class, branches, stratify_by, parallel=None, prepared=False):
+    """
+    Build the landline and cell branches of a mixed vendor file. They are independent, so large files build them
+    in two worker processes at the same time and only the rows of each branch are sent to its process.
+    :param branches: dict of branch name -> rows of the branch type, or the final branches of an earlier run
+    :param parallel: force or disable worker processes, decided by PARALLEL_MIN_ROWS and the CPU count when not specified
+    :param prepared: the branches are final branches of an earlier run, see batch_branch
+    :return: (final landline dataframe, final cell dataframe)
+    """
+    if parallel is None:
+        parallel = sum(len(rows) for rows in branches.values()) >= PARALLEL_MIN_ROWS and (os.cpu_count() or 1) > 1
+
+    if not parallel:
+        return tuple(
+            batch_branch(vendor_class, branch, rows, stratify_by, prepared) for branch, rows in branches.items()
+        )
+
+    with ProcessPoolExecutor(max_workers=len(branches)) as pool:
+        futures = [
+            pool.submit(batch_branch, vendor_class, branch, rows, stratify_by, prepared)
+            for branch, rows in branches.items()
+        ]
+        return tuple(future.result() for future in futures)
+
+
+def split_branches(vendor_class, df):
+    """
+    Rows of each branch type of a mixed vendor file.
+    :return: dict of branch name -> dataframe
+    """
+    return {branch: df[df[col] == value] for branch, (col, value) in vendor_class.branch_types.items()}
+
+
+class MixedVendor:
+    """
+    Vendor file holding landline and cell rows, split by branch_types into a landline and a cell branch that are
+    scrubbed and batched on their own. Subclasses set branch_types and the phone column of the file.
+    """
+    branch_types = {}
+    phone_column = 'PHONE'
+
+    def __init__(self, df: pd.DataFrame, stratify_by: list, progress=None, parallel=None, prepared=None):
+        """
+        :param prepared: prepared of an earlier instance built from the same data, only the batching is run again
+        """
+        self.progress = progress or (lambda stage: None)
         self.stratify_columns = stratify_by
-        self.landline_df = df
-        self.cell_df = df
-        self.headers = df.columns.to_list()
-
-        landline_batches, cell_batches = self.batchify()
-        # plot_batches(landline_batches, stratify_by, source='landline_')
-        # plot_batches(cell_batches, stratify_by, source='cell_')
-
-        for i, batch in enumerate(landline_batches):
-            batch['BATCH'] = i + 1
-
-        for i, batch in enumerate(cell_batches):
-            batch['BATCH'] = i + 1
-
-        self._final_landline = pd.concat(landline_batches).reset_index(drop=True)
-        self._final_cell = pd.concat(cell_batches).reset_index(drop=True)
+        if prepared is None:
+            self.data = df
+            self.headers = df.columns.to_list()
+            self._area_codes = None
+            branches = split_branches(type(self), df)
+            # The WDNC scrub runs inside each branch, next to its batching
+            self.progress('wdnc scrub')
+        else:
+            # Only the batching runs again, the data of the earlier run is not kept
+            self._data = None
+            self.headers, self._area_codes, branches = prepared
+
+        self.progress('batching')
+        with span('batchify', rows_in=sum(len(rows) for rows in branches.values())) as stage:
+            self._final_landline, self._final_cell = build_branches(
+                type(self), branches, stratify_by, parallel, prepared=prepared is not None
+            )
+            stage.rows_out = len(self._final_landline) + len(self._final_cell)
 
-    def batchify(self) -> tuple:
-        landline_batches = stratified_split(self.landline_df, self.stratify_columns)
-        cell_batches = stratified_split(self.cell_df, self.stratify_columns)
-        return landline_batches, cell_batches
+    @property
+    def prepared(self):
+        """
+        What batching starts from: (headers, area codes, dict of branch name -> final branch). The final branches
+        hold the scrubbed rows, so no copy of them is kept.
+        """
+        return self.headers, self.get_area_codes(), {'landline_df': self._final_landline, 'cell_df': self._final_cell}
 
     def get_area_codes(self):
-        return self.data['PHONE'].str[:3].value_counts().head(5)
+        if self._area_codes is None:
+            self._area_codes = area_code_counts(self.data[self.phone_column])
+        return self._area_codes
 
     @property
     def data(self):
@@ -43,9 +126,7 @@ class Tarrance:
 
     @data.setter
     def data(self, df):
-        df['REGN'] = df['REGN'].astype(str).str.pad(2, fillchar='0')
-        df['$N'] = df['PHONE']
-        df['SD'] = df['SD'].astype(str).str.pad(2, fillchar='0')
+        df['$N'] = df[self.phone_column]
         self._data = df
 
     @property
@@ -62,10 +143,11 @@ class Tarrance:
 
     @landline_df.setter
     def landline_df(self, df):
-        df = df[df['CELL'] == 'N']
-        df = df[~df['PHONE'].isin(wdnc)]
-        df.loc[:, 'VTYPE'] = 1
+        col, value = self.branch_types['landline_df']
+        df = df[df[col] == value]
+        df = df[~in_wdnc(df[self.phone_column])]
         df = df.reset_index(drop=True)
+        df['VTYPE'] = 1
         self._landline_df = df
 
     @property
@@ -74,10 +156,11 @@ class Tarrance:
 
     @cell_df.setter
     def cell_df(self, df):
-        df = df[df['CELL'] == 'Y']
-        df.loc[:, 'VTYPE'] = 2
-        df.loc[:, 'MD'] = 1
+        col, value = self.branch_types['cell_df']
+        df = df[df[col] == value]
         df = df.reset_index(drop=True)
+        df['VTYPE'] = 2
+        df['MD'] = 1
         self._cell_df = df
 
     @property
@@ -89,194 +172,154 @@ class Tarrance:
         return self._final_cell
 
 
-class Baselice:
+class Tarrance(MixedVendor):
+    branch_types = {
+        'landline_df': ('CELL', 'N'),
+        'cell_df': ('CELL', 'Y')
+    }
 
-    def __init__(self, df: pd.DataFrame, stratify_by: list):
-        try:
-            # print(df.head().to_string())
-            self.data = df
-            self.stratify_columns = stratify_by
-            self.landline_df = df
-            self.cell_df = df
-            self.headers = df.columns.to_list()
 
-            landline_batches, cell_batches = self.batchify()
+class Baselice(MixedVendor):
+    branch_types = {
+        'landline_df': ('STYPE', '1'),
+        'cell_df': ('STYPE', '2')
+    }
+    phone_column = 'TEL'
+
+    def __init__(self, df: pd.DataFrame, stratify_by: list, progress=None, parallel=None, prepared=None):
+        try:
+            super().__init__(df, stratify_by, progress, parallel, prepared)
+        except Cancelled:
+            raise
         except Exception as e:
             print(traceback.format_exc(), e)
-        # plot_batches(landline_batches, stratify_by, source='landline_')
-        # plot_batches(cell_batches, stratify_by, source='cell_')
-
-        for i, batch in enumerate(landline_batches):
-            batch['BATCH'] = i + 1
-
-        for i, batch in enumerate(cell_batches):
-            batch['BATCH'] = i + 1
 
-        self._final_landline = pd.concat(landline_batches).reset_index(drop=True)
-        self._final_cell = pd.concat(cell_batches).reset_index(drop=True)
-
-    def batchify(self) -> tuple:
-        landline_batches = stratified_split(self.landline_df, self.stratify_columns)
-        cell_batches = stratified_split(self.cell_df, self.stratify_columns)
-        return landline_batches, cell_batches
-
-    def get_area_codes(self):
-        return self.data['TEL'].str[:3].value_counts().head(5)
-
-    @property
-    def data(self):
-        return self._data
-
-    @data.setter
+    @MixedVendor.data.setter
     def data(self, df):
-        if df.get('REGN'):
-            if df['REGN'].value_counts().shape[0] > 9:
-                df['REGN'] = df['REGN'].astype(str).str.pad(2, fillchar='0')
-        df['$N'] = df['TEL']
-        self._data = df
-
-    @property
-    def headers(self):
-        return self._headers
-
-    @headers.setter
-    def headers(self, headers=None):
-        self._headers = headers
-
-    @property
-    def landline_df(self):
-        return self._landline_df
-
-    @landline_df.setter
-    def landline_df(self, df):
-        df.to_csv('landline.csv', index=False)
-        df = df[df['STYPE'] == '1']
-        df = df[~df['TEL'].isin(wdnc)]
-        df.loc[:, 'VTYPE'] = 1
-        df = df.reset_index(drop=True)
-        self._landline_df = df
-
-    @property
-    def cell_df(self):
-        return self._cell_df
-
-    @cell_df.setter
-    def cell_df(self, df):
-        df = df[df['STYPE'] == '2']
-        df.loc[:, 'VTYPE'] = 2
-        df.loc[:, 'MD'] = 1
-        df = df.reset_index(drop=True)
-        self._cell_df = df
-
-    @property
-    def final_landline(self):
-        return self._final_landline
-
-    @property
-    def final_cell(self):
-        return self._final_cell
+        if df.get('REGN') is not None:
+            # Only padded when the regions run past 9, so it cannot live in the static normalization spec
+            if df['REGN'].nunique() > 9:
+                df['REGN'] = ColumnSpec(width=2).apply(df['REGN'])
+        MixedVendor.data.fset(self, df)
 
 
 class I360:
 
-    def __init__(self, df: pd.DataFrame, stratify_by: list, source: str):
-
+    def __init__(self, df: pd.DataFrame, stratify_by: list, source: str, progress=None, prepared=None):
+        """
+        :param prepared: prepared of an earlier instance built from the same data, only the batching is run again
+        """
+        self.progress = progress or (lambda stage: None)
         self.source = source
-        self._df = self.initialize_df(df)
-        '''
+        if prepared is None:
+            self.progress('wdnc scrub')
+            with span('wdnc scrub', rows_in=len(df)) as stage:
+                self._df = self.initialize_df(df)
+                stage.rows_out = len(self._df)
+            '''
         
-        IF 2 or more rows have the same UID (REGARDLESS OF OTHER DATA) -> Delete all except 1 row
+            IF 2 or more rows have the same UID (REGARDLESS OF OTHER DATA) -> Delete all except 1 row
         
-        AGE <- youngest age first
-        FNAME
-        LNAME
-        PHONE
-        GENDER
-        PRTY
+            AGE <- youngest age first
+            FNAME
+            LNAME
+            PHONE
+            GENDER
+            PRTY
         
         
-        [
-            [FNAME, LNAME, GEND, PRTY, IAGE], <- Youngest
-            [FNME2, LNME2, GEND2, PRTY2, IAGE2],
-            [FNME3, LNME3, GEND3, PRTY3, IAGE3], 
-            [FNME4, LNME4, GEND4, PRTY4, IAGE4] <- Oldest
-        ]
+            [
+                [FNAME, LNAME, GEND, PRTY, IAGE], <- Youngest
+                [FNME2, LNME2, GEND2, PRTY2, IAGE2],
+                [FNME3, LNME3, GEND3, PRTY3, IAGE3], 
+                [FNME4, LNME4, GEND4, PRTY4, IAGE4] <- Oldest
+            ]
         
-        '''
+            '''
 
-        if self.source == 'LANDLINE':
-            self.household()
+            if self.source == 'LANDLINE':
+                self.progress('householding')
+                with span('household', rows_in=len(self._df)) as stage:
+                    self.household()
+                    stage.rows_out = len(self._df)
+            self.headers = df.columns.to_list()
+        else:
+            # The final frame of the earlier run holds the householded rows, batching it again renumbers BATCH
+            self._df, self._groups, self.headers = prepared
 
         self.stratify_columns = stratify_by
         # self.set_df(df, source)
-        self.headers = df.columns.to_list()
-
-        batches = self.batchify()
 
-        for i, batch in enumerate(batches):
-            batch['BATCH'] = i + 1
-
-        self._final_df = pd.concat(batches).reset_index(drop=True)
-        plot_batches(batches, stratify_by, source='landline_')
+        self.progress('batching')
+        with span('batchify', rows_in=len(self._df)) as stage:
+            batches = self.batchify()
+            self._final_df = number_batches(batches)
+            stage.rows_out = len(self._final_df)
 
+    @property
+    def prepared(self):
+        """
+        What batching starts from: (final dataframe, dupes groups, headers). The final dataframe holds the scrubbed and
+        householded rows, so no copy of them is kept.
+        """
+        return self._final_df, getattr(self, '_groups', None), self.headers
 
     def batchify(self) -> tuple:
         final_batches = stratified_split(self.df, self.stratify_columns)
         return final_batches
 
     def household(self):
-        household_columns = [
-            'FNME2', 'LNME2', 'GEND2', 'PRTY2', 'IAGE2',
-            'FNME3', 'LNME3', 'GEND3', 'PRTY3', 'IAGE3',
-            'FNME4', 'LNME4', 'GEND4', 'PRTY4', 'IAGE4'
-        ]
+        """
+        Fold every landline shared by several people into the row of its youngest member. The other members fill
+        FNME2..IAGE4 (and further slots for larger households) and are kept aside in the '2 dupes', '3 dupes' and
+        '4 dupes' groups. Members are ranked within their phone with cumcount, so every slot is filled in one pass.
+        """
+        household_attributes = {
+            'FNAME': 'FNME',
+            'LNAME': 'LNME',
+            'GEND': 'GEND',
+            'PRTY': 'PRTY',
+            'IAGE': 'IAGE'
+        }
         groups = {
             '2 dupes': pd.DataFrame(),
             '3 dupes': pd.DataFrame(),
             '4 dupes': pd.DataFrame()
         }
 
-        for col in household_columns:
-            self.df[col] = ''
-
-        group2 = []
-        group3 = []
-        group4 = []
-
-        for phone, group in self.df.groupby('PHONE'):
-            if len(group) > 1:
-
-                first_index = group.index[0]
-                for i, (fname, lname, gend, prty, iage) in enumerate(
-                        zip(group['FNAME'][1:], group['LNAME'][1:], group['GEND'][1:], group['PRTY'][1:],
-                            group['IAGE'][1:]), start=2):
-                    self.df.at[first_index, f'FNME{i}'] = fname
-                    self.df.at[first_index, f'LNME{i}'] = lname
-                    self.df.at[first_index, f'GEND{i}'] = gend
-                    self.df.at[first_index, f'PRTY{i}'] = prty
-                    self.df.at[first_index, f'IAGE{i}'] = iage
-
-                if len(group) == 2:
-                    group2.append(group.iloc[1:].copy())
-                elif len(group) == 3:
-                    group3.append(group.iloc[1:].copy())
-                elif len(group) == 4:
-                    group4.append(group.iloc[1:].copy())
-
-        if group2:
-            groups['2 dupes'] = pd.concat(group2)
-        if group3:
-            groups['3 dupes'] = pd.concat(group3)
-        if group4:
-            groups['4 dupes'] = pd.concat(group4)
+        df = self.df
+        for i in range(2, 5):
+            for prefix in household_attributes.values():
+                df[f'{prefix}{i}'] = pd.Series('', index=df.index, dtype=object)
+
+        listed = has_phone(df['PHONE'])
+        grouped = df[listed].groupby('PHONE', sort=True)
+        rank = np.zeros(len(df), dtype=np.int64)
+        size = np.zeros(len(df), dtype=np.int64)
+        rank[listed] = grouped.cumcount().to_numpy()
+        size[listed] = grouped['PHONE'].transform('size').to_numpy()
+
+        for count in range(2, 5):
+            dupes = df[(size == count) & (rank > 0)]
+            if not dupes.empty:
+                groups[f'{count} dupes'] = dupes.sort_values('PHONE', kind='stable').copy()
+
+        heads = df[listed & (rank == 0) & (size > 1)]
+        head_index = pd.Series(heads.index, index=heads['PHONE'])
+
+        for slot in range(2, size.max(initial=0) + 1):
+            members = df[rank == slot - 1]
+            targets = head_index.loc[members['PHONE']].to_numpy()
+            for column, prefix in household_attributes.items():
+                df.loc[targets, f'{prefix}{slot}'] = members[column].to_numpy()
 
         self._groups = groups
 
         # Remove the duplicates based on the 'PHONE' column, keeping the first occurrence
-        self.df = self.df.drop_duplicates(subset=['PHONE'])
+        self.df = df.drop_duplicates(subset=['PHONE'])
 
     def get_area_codes(self):
-        return self.df['PHONE'].str[:3].value_counts().head(5)
+        return area_code_counts(self.df['PHONE'])
 
     @property
     def headers(self):
@@ -299,12 +342,11 @@ class I360:
         df['RDATE'] = pd.to_datetime(df['RDATE'], errors='coerce')
         df['RDATE'] = df['RDATE'].dt.strftime('%Y%m%d')
 
-        df['PHONE'] = df['PHONE'].str.strip()
-        df['CELL'] = df['CELL'].str.strip()
-
-        df.loc[(df['PHONE'] != '') & (df['CELL'] == ''), 'SOURCE'] = 1
-        df.loc[(df['CELL'] != '') & (df['PHONE'] == ''), 'SOURCE'] = 2
-        df.loc[(df['PHONE'] != '') & (df['CELL'] != ''), 'SOURCE'] = 3
+        landline = has_phone(df['PHONE'])
+        cell = has_phone(df['CELL'])
+        df['SOURCE'] = np.select(
+            [landline & ~cell, cell & ~landline, landline & cell], [1.0, 2.0, 3.0], default=np.nan
+        )
 
         df['IAGE'] = date.today().year - df['DOBY'].astype(int)
         df['IAGE'] = df['IAGE'].fillna(0).astype(int)
@@ -323,23 +365,15 @@ class I360:
 
         df['PRTY'] = df['PARTY'].map(party_mapping).fillna(4).astype(int)
 
-        df['SD'] = df['SD'].astype(str).str.pad(3, fillchar='0')
-        df['GCCD20'] = df['GCCD20'].astype(str).str.pad(2, fillchar='0')
-        df['GCSSD20'] = df['GCSSD20'].astype(str).str.pad(3, fillchar='0')
-        df['GCSHD20'] = df['GCSHD20'].astype(str).str.pad(3, fillchar='0')
-        df['GCD22'] = df['GCD22'].astype(str).str.pad(2, fillchar='0')
-        df['GSD22'] = df['GSD22'].astype(str).str.pad(3, fillchar='0')
-        df['GHD22'] = df['GHD22'].astype(str).str.pad(3, fillchar='0')
-
         if self.source == 'LANDLINE':
             df['$N'] = df['PHONE']
             # Make a copy of the filtered DataFrame
-            df = df[~df['PHONE'].isin(wdnc)].copy()
-            df.loc[:, 'VTYPE'] = 1
+            df = df[~in_wdnc(df['PHONE'])].copy()
+            df['VTYPE'] = 1
         elif self.source == 'CELL':
             df['$N'] = df['CELL']
-            df.loc[:, 'VTYPE'] = 2
-            df.loc[:, 'MD'] = 1
+            df['VTYPE'] = 2
+            df['MD'] = 1
 
         # Reset index and store the DataFrame
         df = df.reset_index(drop=True)
@@ -1,6 +1,177 @@
 import os
+import json
+import hashlib
+import tempfile
 import numpy as np
+import pandas as pd
 
-path = os.environ.get("WDNC_PATH")
+# Permissions of the index file, mkstemp creates it readable by its owner only
+INDEX_MODE = 0o644
 
-wdnc = np.loadtxt(path, dtype=str)
+# (list_version, index) of the loaded WDNC list, see get_index
+_index = None
+
+
+def default_paths(source=None, destination=None):
+    """
+    Resolve the WDNC source and index paths, reading WDNC_PATH and WDNC_INDEX_PATH when not specified.
+    :return: (source, destination)
+    """
+    source = source or os.environ.get("WDNC_PATH")
+    assert source is not None, "Please set the WDNC_PATH environment variable"
+    destination = destination or os.environ.get("WDNC_INDEX_PATH") or f"{source}.idx"
+    return source, destination
+
+
+def file_hash(filename, block_size: int = 1 << 20):
+    """
+    sha256 of a file, read in blocks so large lists do not need to fit in memory.
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def phone_numbers(values) -> tuple:
+    """
+    Convert phone numbers to uint64.
+    :param values: iterable of phone numbers as strings or numbers
+    :return: (uint64 numpy array, boolean mask of the values that are valid numbers)
+    """
+    values = pd.Series(values, copy=False)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        # Already parsed at ingest, see phones.parse_phones, 0 marks a missing number
+        numbers = values.to_numpy()
+        valid = numbers > 0
+        return np.where(valid, numbers, 0).astype(np.uint64), valid
+
+    numbers = pd.to_numeric(values, errors='coerce')
+    valid = (numbers.notna() & (numbers >= 0)).to_numpy()
+    return numbers.where(valid, 0).to_numpy(dtype=np.uint64), valid
+
+
+def build_index(source=None, destination=None):
+    """
+    Convert the WDNC text file into a sorted uint64 array file that can be memory mapped.
+    A metadata file next to the index records the source mtime, size and hash it was built from.
+    :param source: WDNC text file, WDNC_PATH when not specified
+    :param destination: index file, WDNC_INDEX_PATH or the source path with .idx appended when not specified
+    :return: path of the index file
+    """
+    source, destination = default_paths(source, destination)
+
+    try:
+        raw = pd.read_csv(source, header=None, usecols=[0], dtype=str, sep=r'\s+').iloc[:, 0]
+    except pd.errors.EmptyDataError:
+        # An empty or blank list scrubs nothing
+        raw = pd.Series([], dtype=str)
+    numbers, valid = phone_numbers(raw.str.strip())
+    numbers = np.unique(numbers[valid])
+
+    # A unique temporary file, so processes rebuilding the index at the same time never write into each other's file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destination)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            numbers.tofile(file)
+        os.chmod(tmp, INDEX_MODE)
+        os.replace(tmp, destination)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    stat = os.stat(source)
+    with open(f"{destination}.json", 'w') as file:
+        json.dump({'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': file_hash(source)}, file)
+
+    return destination
+
+
+def index_is_current(source, destination):
+    """
+    Check if the index was built from the current source file. The hash is only computed when the mtime or size
+    changed, and a matching hash refreshes the metadata instead of rebuilding.
+    """
+    if not os.path.exists(destination) or not os.path.exists(f"{destination}.json"):
+        return False
+
+    try:
+        with open(f"{destination}.json", 'r') as file:
+            meta = json.load(file)
+    except json.JSONDecodeError:
+        return False
+
+    stat = os.stat(source)
+    if meta.get('mtime') == stat.st_mtime and meta.get('size') == stat.st_size:
+        return True
+
+    if meta.get('sha256') != file_hash(source):
+        return False
+
+    meta.update({'mtime': stat.st_mtime, 'size': stat.st_size})
+    with open(f"{destination}.json", 'w') as file:
+        json.dump(meta, file)
+    return True
+
+
+def load_index(source=None, destination=None):
+    """
+    Memory map the WDNC index, building it first when it is missing or out of date.
+    :return: sorted uint64 numpy array
+    """
+    source, destination = default_paths(source, destination)
+
+    if not index_is_current(source, destination):
+        build_index(source, destination)
+
+    if os.path.getsize(destination) == 0:
+        return np.empty(0, dtype=np.uint64)
+    return np.memmap(destination, dtype=np.uint64, mode='r')
+
+
+def list_version(source=None):
+    """
+    Identity of the WDNC list the scrub runs against, changes whenever the list file is replaced or edited.
+    :return: (absolute source path, size, mtime in ns)
+    """
+    source, _ = default_paths(source)
+    stat = os.stat(source)
+    return os.path.abspath(source), stat.st_size, stat.st_mtime_ns
+
+
+def get_index():
+    """
+    WDNC index of the current list, loaded again when the list file is replaced or edited, so a long running
+    process never scrubs against an old list.
+    """
+    global _index
+    version = list_version()
+    if _index is None or _index[0] != version:
+        _index = (version, load_index())
+    return _index[1]
+
+
+def in_wdnc(phones, index=None) -> np.ndarray:
+    """
+    Vectorized WDNC membership test.
+    :param phones: pandas.Series or array of phone numbers
+    :param index: sorted uint64 array, the WDNC index when not specified
+    :return: boolean numpy array, True where the phone number is on the WDNC list
+    """
+    index = get_index() if index is None else index
+    numbers, valid = phone_numbers(phones)
+
+    if len(index) == 0:
+        return np.zeros(len(numbers), dtype=bool)
+
+    positions = np.searchsorted(index, numbers)
+    positions[positions == len(index)] = 0
+    return valid & (index[positions] == numbers)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    print(build_index())
@@ -0,0 +1,80 @@
+import traceback
+from collections import deque
+
+import PyQt5.QtCore as qtc
+
+from stages import Cancelled, stage_percent
+
+
+class Worker(qtc.QThread):
+    """
+    Runs a task off the UI thread. The task is called with a report function that it should call with the name of
+    each stage as it starts; report emits the progress signal and raises Cancelled once cancel() was requested.
+    """
+    progress = qtc.pyqtSignal(str, int)
+    result = qtc.pyqtSignal(object)
+    error = qtc.pyqtSignal(str)
+    cancelled = qtc.pyqtSignal()
+
+    def __init__(self, task, name='', parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.name = name
+        self._cancel_requested = False
+
+    def cancel(self):
+        self._cancel_requested = True
+
+    def report(self, stage):
+        if self._cancel_requested:
+            raise Cancelled(stage)
+        self.progress.emit(stage, stage_percent(stage))
+
+    def run(self):
+        try:
+            result = self.task(self.report)
+            if self._cancel_requested:
+                raise Cancelled()
+            self.result.emit(result)
+        except Cancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(f"{traceback.format_exc()} {e}")
+
+
+class JobQueue(qtc.QObject):
+    """
+    Runs workers one after another, so the next file can be queued while one is processing.
+    """
+    changed = qtc.pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = deque()
+        self.current = None
+
+    def enqueue(self, worker: Worker):
+        self.pending.append(worker)
+        self.changed.emit(len(self.pending))
+        if self.current is None:
+            self.start_next()
+
+    def start_next(self):
+        if self.current is not None:
+            self.current.wait()
+        if not self.pending:
+            self.current = None
+            self.changed.emit(0)
+            return
+        self.current = self.pending.popleft()
+        self.current.finished.connect(self.start_next)
+        self.changed.emit(len(self.pending))
+        self.current.start()
+
+    def cancel_current(self):
+        if self.current is not None:
+            self.current.cancel()
+
+    def clear(self):
+        self.pending.clear()
+        self.changed.emit(0)
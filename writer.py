@@ -0,0 +1,224 @@
+import os
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Output files written at the same time
+WRITE_WORKERS = 4
+
+SIDECARS = ('gzip', 'parquet')
+
+
+class Output:
+    """
+    One file written by write_outputs.
+    :param name: file name without extension
+    :param data: pandas.DataFrame, or a Series written with its index
+    :param versioned: write to the first free name{n}.csv instead of replacing name.csv
+    """
+
+    def __init__(self, name, data, versioned=False):
+        self.name = name
+        self.data = data
+        self.versioned = versioned
+
+
+def reserve(path):
+    """
+    Create path empty if it does not exist yet, atomically, so no other job can pick the same name.
+    :return: True when path was created
+    """
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+    except FileExistsError:
+        return False
+    return True
+
+
+def allocate_versions(directory, names, ext='.csv'):
+    """
+    First free name, name1, name2, ... for each name, from a single listing of the directory. Every name is reserved
+    by creating it empty, so concurrent jobs writing to the same directory get different numbers.
+    :return: dict of name -> file name with extension
+    """
+    os.makedirs(directory, exist_ok=True)
+    existing = set(os.listdir(directory))
+    versions = {}
+    for name in names:
+        count = 0
+        while True:
+            file_name = f"{name}{count if count > 0 else ''}{ext}"
+            if file_name not in existing and reserve(os.path.join(directory, file_name)):
+                break
+            count += 1
+        versions[name] = file_name
+        existing.add(file_name)
+    return versions
+
+
+def release(paths):
+    """
+    Remove the reserved files that were never written.
+    """
+    for path in paths:
+        try:
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def atomic_write(path, write):
+    """
+    Call write with a temporary path next to path, then move it in place so readers never see a partial file.
+    """
+    directory, name = os.path.split(path)
+    # Unique to this process and thread, jobs writing the same file at the same time never share it
+    tmp = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+def needs_quoting(table):
+    """
+    Check if any string value holds a comma, a quote or a line break. Arrow can only write csv without quoting every
+    string, as pandas does, when none of them do.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    return any(
+        pc.any(pc.match_substring_regex(column, '[,"\r\n]')).as_py()
+        for column in table.columns if pa.types.is_string(column.type)
+    )
+
+
+def quote_header(name):
+    name = str(name)
+    if any(char in name for char in ',"\r\n'):
+        return '"' + name.replace('"', '""') + '"'
+    return name
+
+
+def text_array(column):
+    import pyarrow as pa
+
+    return pa.array(column.map(str, na_action='ignore').to_numpy(dtype=object), from_pandas=True, type=pa.string())
+
+
+def text_table(df):
+    """
+    Arrow table holding the text pandas would write for df: integers as they are, everything else as strings with
+    missing values left null.
+    :return: pyarrow.Table, None when a column cannot be converted this way
+    """
+    import pyarrow as pa
+
+    columns = {}
+    for col in df.columns:
+        column = df[col]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            if column.cat.categories.dtype == object:
+                values = pa.array(column.array, from_pandas=True).cast(pa.string())
+            else:
+                values = text_array(column)
+        elif pd.api.types.is_integer_dtype(column.dtype):
+            values = pa.array(column.to_numpy())
+        elif column.dtype == object:
+            try:
+                values = pa.array(column.to_numpy(), from_pandas=True, type=pa.string())
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                values = text_array(column)
+        elif pd.api.types.is_float_dtype(column.dtype) or pd.api.types.is_bool_dtype(column.dtype):
+            # str() matches the repr pandas writes, e.g. 1.0 rather than Arrow's 1
+            values = text_array(column)
+        else:
+            return None
+        columns[str(col)] = values
+    return pa.table(columns)
+
+
+def write_csv(df, path, compression=None, table=None):
+    """
+    Write a frame as csv with the same text as DataFrame.to_csv(index=False). Arrow's multithreaded writer is used
+    when pyarrow is installed and no value needs quotes, pandas otherwise.
+    :param compression: None or 'gzip'
+    :param table: text_table of df when it was already built
+    """
+    if table is None and importlib.util.find_spec('pyarrow') is not None:
+        table = text_table(df)
+    if table is None or needs_quoting(table):
+        return atomic_write(path, lambda tmp: df.to_csv(tmp, index=False, compression=compression))
+
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    header = ','.join(quote_header(col) for col in df.columns) + '\n'
+
+    def write(tmp):
+        sink = pa.CompressedOutputStream(tmp, 'gzip') if compression == 'gzip' else pa.OSFile(tmp, 'wb')
+        with sink:
+            sink.write(header.encode())
+            pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=False, quoting_style='none'))
+
+    return atomic_write(path, write)
+
+
+def write_parquet(df, path, table=None):
+    if importlib.util.find_spec('pyarrow') is None:
+        print(f"Skipping {path}: pyarrow is not installed")
+        return None
+
+    import pyarrow.parquet as pq
+
+    table = text_table(df) if table is None else table
+    if table is None:
+        return atomic_write(path, lambda tmp: df.to_parquet(tmp, index=False))
+    return atomic_write(path, lambda tmp: pq.write_table(table, tmp))
+
+
+def write_output(path, data, sidecars=()):
+    if isinstance(data, pd.Series):
+        return atomic_write(path, lambda tmp: data.to_csv(tmp))
+
+    table = text_table(data) if importlib.util.find_spec('pyarrow') is not None else None
+    write_csv(data, path, table=table)
+    stem = path[:-len('.csv')]
+    if 'gzip' in sidecars:
+        write_csv(data, f"{stem}.csv.gz", compression='gzip', table=table)
+    if 'parquet' in sidecars:
+        write_parquet(data, f"{stem}.parquet", table=table)
+    return path
+
+
+def write_outputs(directory, outputs, sidecars=(), workers=WRITE_WORKERS):
+    """
+    Write every output concurrently, each one through a temporary file. Versioned names are allocated and reserved
+    from one listing of the directory before anything is written.
+    :param directory: output directory
+    :param outputs: list of Output
+    :param sidecars: also write 'gzip' csv and/or 'parquet' copies of the dataframe outputs
+    :return: dict of output name -> path of the csv written
+    """
+    os.makedirs(directory, exist_ok=True)
+    versions = allocate_versions(directory, [output.name for output in outputs if output.versioned])
+    paths = {
+        output.name: os.path.join(directory, versions.get(output.name, f"{output.name}.csv")) for output in outputs
+    }
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(outputs)))) as pool:
+            futures = {
+                output.name: pool.submit(write_output, paths[output.name], output.data, sidecars) for output in outputs
+            }
+            return {name: future.result() for name, future in futures.items()}
+    except BaseException:
+        release(os.path.join(directory, file_name) for file_name in versions.values())
+        raise